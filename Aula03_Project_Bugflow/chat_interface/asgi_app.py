@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Interface ASGI (Quart) para o sistema RAG de bugs, com chamadas assíncronas
+
+Mesmas rotas do flask_app.py, mas cada pergunta em andamento não ocupa uma
+thread durante a latência do LLM. Um limitador de concorrência controla
+quantas perguntas rodam ao mesmo tempo; quando a fila de espera estoura o
+tempo limite, o servidor responde 503 com Retry-After (no streaming, um
+evento 'done' com retry_after, já que o status 200 foi enviado).
+
+Executar:
+    hypercorn asgi_app:app --bind 0.0.0.0:5000
+"""
+
+import asyncio
+import json
+import os
+import time
+import uuid
+from collections import deque
+
+from quart import Quart, render_template, request, jsonify, g, Response
+
+from async_rag_system import AsyncBugRAGSystem
+
+app = Quart(__name__)
+
+SESSION_COOKIE = 'bugflow_session'
+BUSY_MESSAGE = 'Servidor ocupado, tente novamente em instantes'
+BUSY_RETRY_AFTER = 1
+
+
+class ConcurrencyLimiter:
+    """Limita perguntas simultâneas; quem espera demais recebe backpressure (503)"""
+
+    def __init__(self, max_concurrent: int, max_wait_seconds: float):
+        self.max_concurrent = max_concurrent
+        self.max_wait_seconds = max_wait_seconds
+        self.in_flight = 0
+        self.waiting = 0
+        self.rejected = 0
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+
+    async def acquire(self) -> bool:
+        self.waiting += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.max_wait_seconds)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            return False
+        finally:
+            self.waiting -= 1
+        self.in_flight += 1
+        return True
+
+    def release(self):
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def stats(self):
+        return {
+            'max_concurrent': self.max_concurrent,
+            'in_flight': self.in_flight,
+            'waiting': self.waiting,
+            'rejected': self.rejected
+        }
+
+
+rag_system = None
+limiter = None
+_stream_metrics = deque(maxlen=200)
+
+
+@app.before_serving
+async def startup():
+    """Cria o sistema RAG e o limitador no event loop do servidor"""
+    global rag_system, limiter
+    limiter = ConcurrencyLimiter(
+        max_concurrent=int(os.getenv("BUGFLOW_MAX_CONCURRENT", "32")),
+        max_wait_seconds=float(os.getenv("BUGFLOW_QUEUE_TIMEOUT", "5"))
+    )
+    if rag_system is None:
+        try:
+            rag_system = AsyncBugRAGSystem()
+            print("✅ Sistema RAG assíncrono inicializado com sucesso!")
+        except Exception as e:
+            print(f"❌ Erro ao inicializar sistema RAG: {str(e)}")
+            rag_system = None
+
+
+@app.after_serving
+async def shutdown():
+    if rag_system is not None:
+        await rag_system.aclose()
+
+
+def get_session_id():
+    """Retorna o id de sessão do cookie (ou gera um novo)"""
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if not session_id:
+        session_id = uuid.uuid4().hex
+        g.new_session_id = session_id
+    return session_id
+
+
+@app.after_request
+async def set_session_cookie(response):
+    """Grava o cookie de sessão quando um novo id foi gerado"""
+    new_session_id = g.pop('new_session_id', None)
+    if new_session_id:
+        response.set_cookie(SESSION_COOKIE, new_session_id, httponly=True, samesite='Lax')
+    return response
+
+
+def busy_response():
+    """Resposta de backpressure quando o limite de concorrência foi atingido"""
+    response = jsonify({
+        'success': False,
+        'response': BUSY_MESSAGE,
+        'bugs_encontrados': []
+    })
+    response.status_code = 503
+    response.headers['Retry-After'] = str(BUSY_RETRY_AFTER)
+    return response
+
+
+def sse_event(payload):
+    """Formata um evento Server-Sent Events"""
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+
+@app.route('/')
+async def index():
+    """Página principal"""
+    get_session_id()
+    return await render_template('index.html')
+
+
+@app.route('/chat', methods=['POST'])
+async def chat():
+    """Endpoint para chat"""
+    if not rag_system:
+        return jsonify({
+            'success': False,
+            'response': 'Sistema RAG não está disponível',
+            'bugs_encontrados': []
+        })
+
+    data = await request.get_json() or {}
+    query = data.get('query', '')
+    filters = data.get('filters', {})
+    top_k = data.get('top_k', 5)
+
+    if not query:
+        return jsonify({
+            'success': False,
+            'response': 'Por favor, digite uma pergunta',
+            'bugs_encontrados': []
+        })
+
+    if not await limiter.acquire():
+        return busy_response()
+    try:
+        result = await rag_system.chat(query, filters, top_k, session_id=get_session_id())
+    finally:
+        limiter.release()
+
+    return jsonify(result)
+
+
+@app.route('/chat/stream', methods=['POST'])
+async def chat_stream():
+    """Endpoint de chat em streaming (SSE): bugs primeiro, depois os tokens"""
+    request_start = time.perf_counter()
+    data = await request.get_json() or {}
+    query = data.get('query', '')
+    filters = data.get('filters', {})
+    top_k = data.get('top_k', 5)
+    session_id = get_session_id()
+
+    if not rag_system or not query:
+        message = 'Sistema RAG não está disponível' if not rag_system else 'Por favor, digite uma pergunta'
+        return Response(sse_event({'type': 'done', 'success': False, 'response': message}),
+                        mimetype='text/event-stream')
+
+    async def generate():
+        # A vaga é pega dentro do gerador: se o corpo nunca começar a ser
+        # enviado (cliente desconectou), nada fica preso no limitador
+        if not await limiter.acquire():
+            yield sse_event({'type': 'done', 'success': False, 'response': BUSY_MESSAGE,
+                             'retry_after': BUSY_RETRY_AFTER})
+            return
+        ttfb_ms = None
+        try:
+            async for event in rag_system.chat_stream(query, filters, top_k, session_id=session_id):
+                if ttfb_ms is None:
+                    ttfb_ms = round((time.perf_counter() - request_start) * 1000, 1)
+                if event['type'] == 'done' and event.get('success'):
+                    event['metrics']['ttfb_ms'] = ttfb_ms
+                    _stream_metrics.append(event['metrics'])
+                yield sse_event(event)
+        finally:
+            limiter.release()
+
+    return Response(
+        generate(),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+@app.route('/clear-history', methods=['POST'])
+async def clear_history():
+    """Endpoint para limpar histórico conversacional"""
+    if not rag_system:
+        return jsonify({
+            'success': False,
+            'message': 'Sistema RAG não está disponível'
+        })
+
+    rag_system.clear_conversation_history(get_session_id())
+    return jsonify({
+        'success': True,
+        'message': 'Histórico conversacional limpo com sucesso'
+    })
+
+
+@app.route('/stats')
+async def stats():
+    """Endpoint para estatísticas"""
+    if not rag_system:
+        return jsonify({'error': 'Sistema RAG não disponível'})
+
+    stats = await rag_system.get_index_stats()
+    stats['concurrency'] = limiter.stats()
+    stats['streaming'] = {'samples': len(_stream_metrics)}
+    return jsonify(stats)
+
+
+if __name__ == '__main__':
+    app.run(host='0.0.0.0', port=5000)
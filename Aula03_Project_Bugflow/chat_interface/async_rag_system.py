@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Versão assíncrona do sistema RAG de bugs
+Embedding, busca no Pinecone e geração de resposta sem bloquear o event loop;
+reaproveita memória por sessão, caches e construção de contexto do BugRAGSystem
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from openai import AsyncOpenAI
+
+from rag_system import BugRAGSystem
+from session_memory import DEFAULT_SESSION_ID
+from retrieval_cache import normalize_text, combine_vectors
+
+try:
+    from pinecone_config import get_pinecone_client
+except ImportError:
+    get_pinecone_client = None
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncBugRAGSystem(BugRAGSystem):
+    """
+    Sistema RAG com chamadas assíncronas (AsyncOpenAI e índice assíncrono do
+    Pinecone). Sem índice assíncrono disponível, a query síncrona roda em
+    thread separada via asyncio.to_thread.
+    """
+
+    def __init__(self, index=None, openai_client=None, async_index=None, async_openai_client=None):
+        self.async_index = async_index
+        self.async_openai_client = async_openai_client
+        super().__init__(index=index, openai_client=openai_client)
+
+    def _initialize_clients(self):
+        """Inicializa os clientes síncronos e as versões assíncronas"""
+        super()._initialize_clients()
+
+        if self.async_openai_client is None:
+            self.async_openai_client = AsyncOpenAI(api_key=self.openai_api_key)
+
+        if self.async_index is None and get_pinecone_client is not None:
+            try:
+                pc = get_pinecone_client()
+                host = pc.describe_index(self.index_name).host
+                self.async_index = pc.IndexAsyncio(host=host)
+            except Exception as e:
+                logger.warning(f"Índice assíncrono do Pinecone indisponível, usando thread: {str(e)}")
+
+    async def aclose(self):
+        """Fecha os clientes assíncronos"""
+        if self.async_index is not None and hasattr(self.async_index, 'close'):
+            await self.async_index.close()
+        if self.async_openai_client is not None and hasattr(self.async_openai_client, 'close'):
+            await self.async_openai_client.close()
+
+    async def create_query_embedding(self, query: str) -> List[float]:
+        """Cria embedding da query do usuário usando o mesmo modelo do índice"""
+        cache_key = normalize_text(query)
+        cached = self.embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
+        try:
+            response = await self.async_openai_client.embeddings.create(
+                input=query,
+                model="text-embedding-3-small",  # Mesmo modelo do índice Pinecone
+                dimensions=1536  # Mesma dimensão do índice
+            )
+            embedding = response.data[0].embedding
+            self.embedding_cache.set(cache_key, embedding)
+            return embedding
+        except Exception as e:
+            logger.error(f"❌ Erro ao criar embedding: {str(e)}")
+            return []
+
+    async def _create_search_vector(self, query: str, session_id: str = DEFAULT_SESSION_ID) -> List[float]:
+        """Embeddings da query e do contexto em paralelo, combinados localmente"""
+        recent_context = self.sessions.get(session_id).recent(3)  # Últimas 3 interações
+        if not recent_context:
+            return await self.create_query_embedding(query)
+
+        query_embedding, context_embedding = await asyncio.gather(
+            self.create_query_embedding(query),
+            self.create_query_embedding(" ".join(recent_context))
+        )
+        if not query_embedding:
+            return []
+        return combine_vectors(query_embedding, context_embedding, self.context_weight)
+
+    async def _query_index(self, search_params: Dict[str, Any]):
+        if self.async_index is not None:
+            result = self.async_index.query(**search_params)
+            return await result if inspect.isawaitable(result) else result
+        return await asyncio.to_thread(self.index.query, **search_params)
+
+    async def search_similar_bugs(self, query: str, top_k: int = 5, filters: Optional[Dict] = None,
+                                  session_id: str = DEFAULT_SESSION_ID) -> List[Dict]:
+        """Busca bugs similares usando embedding semântico com contexto conversacional"""
+        try:
+            query_embedding = await self._create_search_vector(query, session_id)
+            if not query_embedding:
+                return []
+
+            search_params, cache_key = self._prepare_search(query_embedding, top_k, filters)
+
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"✅ {len(cached)} bugs similares (cache)")
+                return [dict(bug) for bug in cached]
+
+            results = await self._query_index(search_params)
+            return self._process_matches(results, cache_key)
+
+        except Exception as e:
+            logger.error(f"❌ Erro na busca: {str(e)}")
+            return []
+
+    async def generate_response(self, query: str, context: str) -> str:
+        """Gera resposta usando OpenAI com o contexto dos bugs"""
+        try:
+            response = await self.async_openai_client.chat.completions.create(
+                model="gpt-4o",
+                messages=self._build_messages(query, context),
+                temperature=0.1,
+                max_tokens=1000
+            )
+
+            return response.choices[0].message.content
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar resposta: {str(e)}")
+            return f"Desculpe, ocorreu um erro ao processar sua pergunta: {str(e)}"
+
+    async def generate_response_stream(self, query: str, context: str) -> AsyncIterator[str]:
+        """Gera resposta em streaming, produzindo os trechos de texto conforme chegam"""
+        try:
+            stream = await self.async_openai_client.chat.completions.create(
+                model="gpt-4o",
+                messages=self._build_messages(query, context),
+                temperature=0.1,
+                max_tokens=1000,
+                stream=True
+            )
+
+            async for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar resposta: {str(e)}")
+            yield f"Desculpe, ocorreu um erro ao processar sua pergunta: {str(e)}"
+
+    async def chat(self, query: str, filters: Optional[Dict] = None, top_k: int = 5,
+                   session_id: str = DEFAULT_SESSION_ID) -> Dict[str, Any]:
+        """Função principal do chat RAG com memória conversacional"""
+        try:
+            bugs_similares = await self.search_similar_bugs(query, top_k, filters, session_id)
+            context = self.build_context(bugs_similares)
+            response = await self.generate_response(query, context)
+            history_size = self._update_conversation_history(query, response, bugs_similares, session_id)
+
+            return {
+                'response': response,
+                'bugs_encontrados': bugs_similares,
+                'context_used': context,
+                'conversation_history_size': history_size,
+                'success': True
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Erro no chat: {str(e)}")
+            return {
+                'response': f"Desculpe, ocorreu um erro: {str(e)}",
+                'bugs_encontrados': [],
+                'context_used': "",
+                'success': False
+            }
+
+    async def chat_stream(self, query: str, filters: Optional[Dict] = None, top_k: int = 5,
+                          session_id: str = DEFAULT_SESSION_ID) -> AsyncIterator[Dict[str, Any]]:
+        """Versão em streaming do chat (mesmos eventos de BugRAGSystem.chat_stream)"""
+        start = time.perf_counter()
+        try:
+            bugs_similares = await self.search_similar_bugs(query, top_k, filters, session_id)
+            context = self.build_context(bugs_similares)
+
+            bugs_ms = (time.perf_counter() - start) * 1000
+            yield {
+                'type': 'bugs',
+                'bugs_encontrados': bugs_similares
+            }
+
+            parts = []
+            first_token_ms = None
+            async for token in self.generate_response_stream(query, context):
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                parts.append(token)
+                yield {'type': 'token', 'content': token}
+
+            response = "".join(parts)
+            history_size = self._update_conversation_history(query, response, bugs_similares, session_id)
+
+            metrics = {
+                'bugs_ms': round(bugs_ms, 1),
+                'first_token_ms': round(first_token_ms, 1) if first_token_ms is not None else None,
+                'total_ms': round((time.perf_counter() - start) * 1000, 1)
+            }
+            logger.info(f"Streaming concluído: {metrics}")
+            yield {
+                'type': 'done',
+                'success': True,
+                'conversation_history_size': history_size,
+                'metrics': metrics
+            }
+
+        except Exception as e:
+            logger.error(f"❌ Erro no chat: {str(e)}")
+            yield {
+                'type': 'done',
+                'success': False,
+                'response': f"Desculpe, ocorreu um erro: {str(e)}"
+            }
+
+    async def get_index_stats(self) -> Dict[str, Any]:
+        """Obtém estatísticas do índice Pinecone"""
+        return await asyncio.to_thread(super().get_index_stats)
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Benchmark: servidor Flask (síncrono, uma thread por pergunta) x servidor
+ASGI assíncrono, ambos com OpenAI e Pinecone substituídos por stubs que
+apenas simulam latência de rede.
+
+Uso:
+    python benchmark_servers.py --requests 200 --concurrency 50
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+EMBED_LATENCY = 0.05
+QUERY_LATENCY = 0.03
+LLM_LATENCY = 0.5
+
+
+def _embedding_response():
+    return SimpleNamespace(data=[SimpleNamespace(embedding=[0.01] * 1536)])
+
+
+def _completion_response():
+    message = SimpleNamespace(content="Resposta simulada citando o Bug #1")
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _query_response():
+    matches = [
+        SimpleNamespace(id=str(i), score=0.9 - i * 0.1,
+                        metadata={'componente': 'API', 'descricao': 'Erro simulado ' * 20})
+        for i in range(5)
+    ]
+    return SimpleNamespace(matches=matches)
+
+
+class StubIndex:
+    def query(self, **kwargs):
+        time.sleep(QUERY_LATENCY)
+        return _query_response()
+
+    def describe_index_stats(self):
+        return SimpleNamespace(total_vector_count=5, dimension=1536, index_fullness=0.0)
+
+
+class StubAsyncIndex:
+    async def query(self, **kwargs):
+        await asyncio.sleep(QUERY_LATENCY)
+        return _query_response()
+
+
+class StubOpenAI:
+    def __init__(self):
+        self.embeddings = SimpleNamespace(create=self._embed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+
+    def _embed(self, **kwargs):
+        time.sleep(EMBED_LATENCY)
+        return _embedding_response()
+
+    def _complete(self, **kwargs):
+        time.sleep(LLM_LATENCY)
+        return _completion_response()
+
+
+class StubAsyncOpenAI:
+    def __init__(self):
+        self.embeddings = SimpleNamespace(create=self._embed)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._complete))
+
+    async def _embed(self, **kwargs):
+        await asyncio.sleep(EMBED_LATENCY)
+        return _embedding_response()
+
+    async def _complete(self, **kwargs):
+        await asyncio.sleep(LLM_LATENCY)
+        return _completion_response()
+
+
+def start_flask(port):
+    from werkzeug.serving import make_server
+    import flask_app
+    from rag_system import BugRAGSystem
+
+    flask_app._rag_system = BugRAGSystem(index=StubIndex(), openai_client=StubOpenAI())
+    flask_app._rag_system_pid = os.getpid()
+    server = make_server('127.0.0.1', port, flask_app.app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.shutdown
+
+
+def start_asgi(port, max_concurrent):
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+    import asgi_app
+    from async_rag_system import AsyncBugRAGSystem
+
+    os.environ['BUGFLOW_MAX_CONCURRENT'] = str(max_concurrent)
+    asgi_app.rag_system = AsyncBugRAGSystem(
+        index=StubIndex(), openai_client=StubOpenAI(),
+        async_index=StubAsyncIndex(), async_openai_client=StubAsyncOpenAI()
+    )
+    config = Config()
+    config.bind = [f'127.0.0.1:{port}']
+    config.accesslog = None
+    config.errorlog = None
+
+    loop = asyncio.new_event_loop()
+    stop = asyncio.Event()
+
+    def run():
+        asyncio.set_event_loop(loop)
+        loop.run_until_complete(serve(asgi_app.app, config, shutdown_trigger=stop.wait))
+
+    threading.Thread(target=run, daemon=True).start()
+    return lambda: loop.call_soon_threadsafe(stop.set)
+
+
+def wait_until_ready(port, timeout=10.0):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            urllib.request.urlopen(f'http://127.0.0.1:{port}/stats', timeout=1).read()
+            return
+        except Exception:
+            time.sleep(0.1)
+    raise RuntimeError(f"Servidor na porta {port} não respondeu")
+
+
+def post_chat(port, i):
+    body = json.dumps({'query': f'pergunta de benchmark {i}', 'top_k': 5}).encode()
+    req = urllib.request.Request(f'http://127.0.0.1:{port}/chat', data=body,
+                                 headers={'Content-Type': 'application/json'})
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=60) as response:
+            response.read()
+            ok = response.status == 200
+    except Exception:
+        ok = False
+    return time.perf_counter() - start, ok
+
+
+def run_load(name, port, total, concurrency):
+    wait_until_ready(port)
+
+    # Pico de threads do processo (clientes + servidor) durante a carga
+    peak_threads = [threading.active_count()]
+    sampling = threading.Event()
+
+    def sample_threads():
+        while not sampling.is_set():
+            peak_threads[0] = max(peak_threads[0], threading.active_count())
+            time.sleep(0.01)
+
+    threading.Thread(target=sample_threads, daemon=True).start()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        results = list(pool.map(lambda i: post_chat(port, i), range(total)))
+    elapsed = time.perf_counter() - start
+    sampling.set()
+
+    latencies = sorted(r[0] for r in results if r[1])
+    errors = sum(1 for r in results if not r[1])
+    p95 = latencies[int(len(latencies) * 0.95) - 1] if latencies else 0
+    print(f"{name:>6}: {total / elapsed:7.1f} req/s | "
+          f"p50 {statistics.median(latencies) * 1000 if latencies else 0:7.1f}ms | "
+          f"p95 {p95 * 1000:7.1f}ms | erros {errors} | pico de threads {peak_threads[0]}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=200)
+    parser.add_argument('--concurrency', type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"Stubs: embedding {EMBED_LATENCY * 1000:.0f}ms, Pinecone {QUERY_LATENCY * 1000:.0f}ms, "
+          f"LLM {LLM_LATENCY * 1000:.0f}ms | {args.requests} perguntas, {args.concurrency} simultâneas")
+
+    stop_flask = start_flask(5101)
+    run_load('flask', 5101, args.requests, args.concurrency)
+    stop_flask()
+
+    stop_asgi = start_asgi(5102, max_concurrent=args.concurrency)
+    run_load('asgi', 5102, args.requests, args.concurrency)
+    stop_asgi()
+
+
+if __name__ == '__main__':
+    main()
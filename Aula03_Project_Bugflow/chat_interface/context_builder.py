@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Construção do contexto de bugs para o LLM com orçamento real de tokens
+- contagem com tokenizer (tiktoken), com cache por bug
+- deduplicação dos vetores bruto e bug_{id}_processado do mesmo bug
+- empacotamento guloso por score com truncamento adaptativo por bug
+"""
+
+import hashlib
+import re
+from typing import Dict, List, Optional
+
+from retrieval_cache import TTLCache
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    tiktoken = None
+    TIKTOKEN_AVAILABLE = False
+
+PROCESSED_ID_PATTERN = re.compile(r"^bug_(.+)_processado$")
+CONTEXT_HEADER = "=== BUGS RELEVANTES ENCONTRADOS ===\n"
+
+
+def canonical_bug_id(bug: Dict) -> str:
+    """Id do bug independente do vetor (bruto '12' ou processado 'bug_12_processado')"""
+    metadata = bug.get('metadata') or {}
+    if metadata.get('bug_id'):
+        return str(metadata['bug_id'])
+    match = PROCESSED_ID_PATTERN.match(str(bug['id']))
+    return match.group(1) if match else str(bug['id'])
+
+
+def dedupe_bugs(bugs: List[Dict]) -> List[Dict]:
+    """
+    Mantém um resultado por bug (o de maior score), completando os metadados
+    ausentes com os do outro vetor. Retorna ordenado por score decrescente.
+    """
+    merged: Dict[str, Dict] = {}
+    for bug in bugs:
+        key = canonical_bug_id(bug)
+        current = merged.get(key)
+        if current is None:
+            merged[key] = {**bug, 'metadata': dict(bug.get('metadata') or {})}
+            continue
+
+        best, other = (bug, current) if bug.get('score', 0) > current.get('score', 0) else (current, bug)
+        metadata = dict(other.get('metadata') or {})
+        metadata.update({k: v for k, v in (best.get('metadata') or {}).items() if v})
+        merged[key] = {**best, 'metadata': metadata}
+
+    return sorted(merged.values(), key=lambda b: b.get('score', 0), reverse=True)
+
+
+class ContextBuilder:
+    """Monta o contexto respeitando max_tokens medido pelo tokenizer do modelo"""
+
+    def __init__(self, model: str = "gpt-4o", min_content_tokens: int = 40,
+                 cache_size: int = 4096):
+        self.min_content_tokens = min_content_tokens
+        self.encoding = self._load_encoding(model)
+        self._token_cache = TTLCache(max_size=cache_size)
+
+    @staticmethod
+    def _load_encoding(model: str):
+        if not TIKTOKEN_AVAILABLE:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("o200k_base")
+
+    def encode(self, text: str) -> List:
+        """Tokeniza o texto (com cache). Sem tiktoken, usa blocos de 4 caracteres."""
+        key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        tokens = self._token_cache.get(key)
+        if tokens is None:
+            if self.encoding is not None:
+                tokens = self.encoding.encode(text)
+            else:
+                tokens = [text[i:i + 4] for i in range(0, len(text), 4)]
+            self._token_cache.set(key, tokens)
+        return tokens
+
+    def count_tokens(self, text: str) -> int:
+        return len(self.encode(text))
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        tokens = self.encode(text)
+        if len(tokens) <= max_tokens:
+            return text
+        # Reserva um token para as reticências
+        kept = tokens[:max(max_tokens - 1, 0)]
+        if self.encoding is not None:
+            return self.encoding.decode(kept) + "..."
+        return "".join(kept) + "..."
+
+    @staticmethod
+    def _format_header(bug_id: str, bug: Dict) -> str:
+        metadata = bug.get('metadata') or {}
+        return f"""
+Bug #{bug_id} (Relevância: {bug.get('score', 0):.2f})
+- Componente: {metadata.get('componente', 'N/A')}
+- Severidade: {metadata.get('severidade', 'N/A')}
+- Desenvolvedor: {metadata.get('desenvolvedor', 'N/A')}
+- Status: {metadata.get('status_resolucao', 'N/A')}
+- Conteúdo: """
+
+    @staticmethod
+    def _content(bug: Dict) -> str:
+        metadata = bug.get('metadata') or {}
+        return metadata.get('conteudo_completo') or metadata.get('descricao') or 'N/A'
+
+    def build(self, bugs: List[Dict], max_tokens: int = 3000) -> Optional[str]:
+        """
+        Empacota os bugs (deduplicados, por score) dentro de max_tokens.
+        Cada bug recebe uma fatia do orçamento restante proporcional ao seu
+        score; o que um bug curto não usa fica para os próximos.
+        """
+        bugs = dedupe_bugs(bugs)
+        if not bugs:
+            return None
+
+        parts = [CONTEXT_HEADER]
+        remaining = max_tokens - self.count_tokens(CONTEXT_HEADER)
+        entries = [(canonical_bug_id(bug), bug) for bug in bugs]
+        headers = [self.count_tokens(self._format_header(bug_id, bug) + "\n\n\n") for bug_id, bug in entries]
+
+        for i, (bug_id, bug) in enumerate(entries):
+            header = self._format_header(bug_id, bug)
+            available = remaining - headers[i]
+            if available < self.min_content_tokens:
+                break
+
+            # Fatia proporcional ao score entre os bugs que ainda faltam
+            scores = [max(b.get('score', 0), 0.0) for _, b in entries[i:]]
+            total_score = sum(scores) or len(scores)
+            reserved_headers = sum(headers[i + 1:])
+            share = (available - reserved_headers) * (scores[0] or 1) / total_score
+            content_budget = int(max(self.min_content_tokens, min(available, share)))
+
+            content = self.truncate(self._content(bug), content_budget)
+            block = f"{header}{content}\n\n"
+            parts.append(block)
+            remaining -= self.count_tokens(block + "\n")
+
+        return "\n".join(parts)
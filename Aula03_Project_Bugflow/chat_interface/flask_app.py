@@ -3,64 +3,176 @@
 
 """
 Interface Flask para o sistema RAG de bugs
+
+Cada navegador recebe um cookie de sessão próprio; o histórico conversacional
+fica isolado por sessão dentro do BugRAGSystem.
+
+Para servir com múltiplas threads/processos (ex.: gunicorn):
+    gunicorn -w 2 --threads 8 -b 0.0.0.0:5000 flask_app:app
+O sistema RAG é criado sob demanda em cada processo (após o fork), e a memória
+de cada sessão vive no processo que a atendeu - use sticky sessions no proxy
+quando houver mais de um worker.
 """
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, render_template, request, jsonify, g, Response, stream_with_context
 import os
+import json
+import threading
+import time
+import uuid
+from collections import deque
 from rag_system import BugRAGSystem
 
 app = Flask(__name__)
 
-# Inicializar sistema RAG
-try:
-    rag_system = BugRAGSystem()
-    print("✅ Sistema RAG inicializado com sucesso!")
-except Exception as e:
-    print(f"❌ Erro ao inicializar sistema RAG: {str(e)}")
-    rag_system = None
+SESSION_COOKIE = 'bugflow_session'
+
+# Sistema RAG por processo, inicializado sob demanda
+_rag_system = None
+_rag_system_pid = None
+_rag_system_lock = threading.Lock()
+
+# Métricas recentes do /chat/stream (tempo até o primeiro byte/token)
+_stream_metrics = deque(maxlen=200)
+_stream_metrics_lock = threading.Lock()
+
+def get_rag_system():
+    """Retorna o sistema RAG deste processo (cria na primeira chamada)"""
+    global _rag_system, _rag_system_pid
+    pid = os.getpid()
+    if _rag_system_pid == pid:
+        return _rag_system
+
+    with _rag_system_lock:
+        if _rag_system_pid != pid:
+            try:
+                _rag_system = BugRAGSystem()
+                print("✅ Sistema RAG inicializado com sucesso!")
+            except Exception as e:
+                print(f"❌ Erro ao inicializar sistema RAG: {str(e)}")
+                _rag_system = None
+            _rag_system_pid = pid
+    return _rag_system
+
+def get_session_id():
+    """Retorna o id de sessão do cookie (ou gera um novo)"""
+    session_id = request.cookies.get(SESSION_COOKIE)
+    if not session_id:
+        session_id = uuid.uuid4().hex
+        g.new_session_id = session_id
+    return session_id
+
+@app.after_request
+def set_session_cookie(response):
+    """Grava o cookie de sessão quando um novo id foi gerado"""
+    new_session_id = g.pop('new_session_id', None)
+    if new_session_id:
+        response.set_cookie(SESSION_COOKIE, new_session_id, httponly=True, samesite='Lax')
+    return response
 
 @app.route('/')
 def index():
     """Página principal"""
+    get_session_id()
     return render_template('index.html')
 
 @app.route('/chat', methods=['POST'])
 def chat():
     """Endpoint para chat"""
+    rag_system = get_rag_system()
     if not rag_system:
         return jsonify({
             'success': False,
             'response': 'Sistema RAG não está disponível',
             'bugs_encontrados': []
         })
-    
+
     data = request.json
     query = data.get('query', '')
     filters = data.get('filters', {})
     top_k = data.get('top_k', 5)
-    
+
     if not query:
         return jsonify({
             'success': False,
             'response': 'Por favor, digite uma pergunta',
             'bugs_encontrados': []
         })
-    
+
     # Processar query
-    result = rag_system.chat(query, filters, top_k)
-    
+    result = rag_system.chat(query, filters, top_k, session_id=get_session_id())
+
     return jsonify(result)
 
+def sse_event(payload):
+    """Formata um evento Server-Sent Events"""
+    return f"data: {json.dumps(payload, ensure_ascii=False)}\n\n"
+
+def _record_stream_metrics(metrics):
+    with _stream_metrics_lock:
+        _stream_metrics.append(metrics)
+
+def get_stream_metrics():
+    """Resumo (média e p95) das métricas recentes de streaming"""
+    with _stream_metrics_lock:
+        samples = list(_stream_metrics)
+    summary = {'samples': len(samples)}
+    for key in ('ttfb_ms', 'first_token_ms', 'total_ms'):
+        values = sorted(m[key] for m in samples if m.get(key) is not None)
+        if values:
+            summary[key] = {
+                'avg': round(sum(values) / len(values), 1),
+                'p95': values[min(len(values) - 1, int(len(values) * 0.95))]
+            }
+    return summary
+
+@app.route('/chat/stream', methods=['POST'])
+def chat_stream():
+    """Endpoint de chat em streaming (SSE): bugs primeiro, depois os tokens"""
+    rag_system = get_rag_system()
+    data = request.json or {}
+    query = data.get('query', '')
+    filters = data.get('filters', {})
+    top_k = data.get('top_k', 5)
+    session_id = get_session_id()
+    request_start = time.perf_counter()
+
+    def generate():
+        if not rag_system:
+            yield sse_event({'type': 'done', 'success': False,
+                             'response': 'Sistema RAG não está disponível'})
+            return
+        if not query:
+            yield sse_event({'type': 'done', 'success': False,
+                             'response': 'Por favor, digite uma pergunta'})
+            return
+
+        ttfb_ms = None
+        for event in rag_system.chat_stream(query, filters, top_k, session_id=session_id):
+            if ttfb_ms is None:
+                ttfb_ms = round((time.perf_counter() - request_start) * 1000, 1)
+            if event['type'] == 'done' and event.get('success'):
+                event['metrics']['ttfb_ms'] = ttfb_ms
+                _record_stream_metrics(event['metrics'])
+            yield sse_event(event)
+
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @app.route('/clear-history', methods=['POST'])
 def clear_history():
     """Endpoint para limpar histórico conversacional"""
+    rag_system = get_rag_system()
     if not rag_system:
         return jsonify({
             'success': False,
             'message': 'Sistema RAG não está disponível'
         })
-    
-    rag_system.clear_conversation_history()
+
+    rag_system.clear_conversation_history(get_session_id())
     return jsonify({
         'success': True,
         'message': 'Histórico conversacional limpo com sucesso'
@@ -69,11 +181,13 @@ def clear_history():
 @app.route('/stats')
 def stats():
     """Endpoint para estatísticas"""
+    rag_system = get_rag_system()
     if not rag_system:
         return jsonify({'error': 'Sistema RAG não disponível'})
-    
+
     stats = rag_system.get_index_stats()
+    stats['streaming'] = get_stream_metrics()
     return jsonify(stats)
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
+    app.run(debug=True, host='0.0.0.0', port=5000, threaded=True)
@@ -9,9 +9,14 @@ Permite busca semântica e geração de respostas contextualizadas
 import os
 import logging
 import sys
+import time
 from openai import OpenAI
 from dotenv import load_dotenv
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from session_memory import SessionMemoryStore, DEFAULT_SESSION_ID
+from retrieval_cache import TTLCache, normalize_text, vector_hash, filters_key, combine_vectors
+from context_builder import ContextBuilder
 
 # Adicionar diretório pai ao path para importar pinecone_config
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -29,8 +34,12 @@ logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class BugRAGSystem:
-    def __init__(self):
-        """Inicializa o sistema RAG"""
+    def __init__(self, index=None, openai_client=None):
+        """
+        Inicializa o sistema RAG
+        index/openai_client permitem injetar clientes já criados (ex.: stubs
+        em benchmarks); se omitidos, são criados a partir do .env
+        """
         load_dotenv()
         
         # Configurações
@@ -38,14 +47,33 @@ class BugRAGSystem:
         self.index_name = "bugflow"
         
         # Inicializar clientes
-        self.index = None
-        self.openai_client = None
+        self.index = index
+        self.openai_client = openai_client
         
-        # Memória conversacional
-        self.conversation_history = []
+        # Memória conversacional por sessão (LRU + TTL, thread-safe)
         self.max_history_length = 10  # Manter últimas 10 interações
+        self.sessions = SessionMemoryStore(
+            max_sessions=int(os.getenv("BUGFLOW_MAX_SESSIONS", "1000")),
+            ttl_seconds=float(os.getenv("BUGFLOW_SESSION_TTL", "3600")),
+            max_history_length=self.max_history_length
+        )
+        
+        # Caches da recuperação: embeddings por texto normalizado e
+        # resultados do Pinecone com TTL curto
+        self.context_weight = float(os.getenv("BUGFLOW_CONTEXT_WEIGHT", "0.35"))
+        self.embedding_cache = TTLCache(
+            max_size=int(os.getenv("BUGFLOW_EMBEDDING_CACHE_SIZE", "2048"))
+        )
+        self.search_cache = TTLCache(
+            max_size=int(os.getenv("BUGFLOW_SEARCH_CACHE_SIZE", "512")),
+            ttl_seconds=float(os.getenv("BUGFLOW_SEARCH_CACHE_TTL", "60"))
+        )
         
-        self._initialize_clients()
+        # Contexto com orçamento medido pelo tokenizer do modelo de resposta
+        self.context_builder = ContextBuilder(model="gpt-4o")
+        
+        if self.index is None or self.openai_client is None:
+            self._initialize_clients()
     
     def _initialize_clients(self):
         """Inicializa os clientes Pinecone e OpenAI"""
@@ -67,32 +95,49 @@ class BugRAGSystem:
     
     def create_query_embedding(self, query: str) -> List[float]:
         """Cria embedding da query do usuário usando o mesmo modelo do índice"""
+        cache_key = normalize_text(query)
+        cached = self.embedding_cache.get(cache_key)
+        if cached is not None:
+            return cached
+        
         try:
             response = self.openai_client.embeddings.create(
                 input=query,
                 model="text-embedding-3-small",  # Mesmo modelo do índice Pinecone
                 dimensions=1536  # Mesma dimensão do índice
             )
-            return response.data[0].embedding
+            embedding = response.data[0].embedding
+            self.embedding_cache.set(cache_key, embedding)
+            return embedding
         except Exception as e:
             logger.error(f"❌ Erro ao criar embedding: {str(e)}")
             return []
     
-    def _enrich_query_with_context(self, query: str) -> str:
-        """Enriquece a query com contexto conversacional"""
-        if not self.conversation_history:
-            return query
-            
+    def get_conversation_history(self, session_id: str = DEFAULT_SESSION_ID) -> List[str]:
+        """Retorna cópia do histórico conversacional da sessão"""
+        return self.sessions.get(session_id).snapshot()
+    
+    def _create_search_vector(self, query: str, session_id: str = DEFAULT_SESSION_ID) -> List[float]:
+        """
+        Cria o vetor de busca com contexto conversacional.
+        Query e contexto são embeddados (e cacheados) separadamente e
+        combinados localmente, para que perguntas repetidas reaproveitem o cache.
+        """
+        query_embedding = self.create_query_embedding(query)
+        if not query_embedding:
+            return []
+        
         # Pegar últimas interações relevantes
-        recent_context = self.conversation_history[-3:]  # Últimas 3 interações
-        context_text = " ".join(recent_context)
+        recent_context = self.sessions.get(session_id).recent(3)  # Últimas 3 interações
+        if not recent_context:
+            return query_embedding
         
-        # Enriquecer query com contexto
-        enriched = f"{query} {context_text}"
-        logger.info(f"Query enriquecida: {enriched[:100]}...")
-        return enriched
+        context_embedding = self.create_query_embedding(" ".join(recent_context))
+        logger.info(f"Query combinada com contexto de {len(recent_context)} interações")
+        return combine_vectors(query_embedding, context_embedding, self.context_weight)
     
-    def _update_conversation_history(self, query: str, response: str, bugs_found: List[Dict]):
+    def _update_conversation_history(self, query: str, response: str, bugs_found: List[Dict],
+                                     session_id: str = DEFAULT_SESSION_ID) -> int:
         """Atualiza o histórico conversacional"""
         # Extrair informações relevantes dos bugs encontrados
         bug_context = ""
@@ -102,71 +147,85 @@ class BugRAGSystem:
         
         # Adicionar ao histórico
         interaction = f"Q: {query} A: {response[:100]}...{bug_context}"
-        self.conversation_history.append(interaction)
+        # Mantém apenas as últimas interações
+        history_size = self.sessions.get(session_id).append(interaction)
         
-        # Manter apenas as últimas interações
-        if len(self.conversation_history) > self.max_history_length:
-            self.conversation_history = self.conversation_history[-self.max_history_length:]
-        
-        logger.info(f"Histórico atualizado. Total de interações: {len(self.conversation_history)}")
+        logger.info(f"Histórico atualizado. Total de interações: {history_size}")
+        return history_size
     
-    def clear_conversation_history(self):
-        """Limpa o histórico conversacional"""
-        self.conversation_history = []
+    def clear_conversation_history(self, session_id: str = DEFAULT_SESSION_ID):
+        """Limpa o histórico conversacional da sessão"""
+        self.sessions.clear(session_id)
         logger.info("Histórico conversacional limpo")
     
-    def get_conversation_summary(self) -> str:
+    def get_conversation_summary(self, session_id: str = DEFAULT_SESSION_ID) -> str:
         """Retorna resumo do histórico conversacional"""
-        if not self.conversation_history:
+        history = self.get_conversation_history(session_id)
+        if not history:
             return "Nenhuma conversa anterior"
         
-        return f"Histórico: {len(self.conversation_history)} interações. Últimas: {self.conversation_history[-2:]}"
+        return f"Histórico: {len(history)} interações. Últimas: {history[-2:]}"
+    
+    def _prepare_search(self, query_embedding: List[float], top_k: int,
+                        filters: Optional[Dict] = None) -> Tuple[Dict[str, Any], Tuple]:
+        """Monta os parâmetros da query no Pinecone e a chave do cache de resultados"""
+        # Preparar filtros
+        filter_dict = {}
+        if filters:
+            if filters.get('componente'):
+                filter_dict['componente'] = filters['componente']
+            if filters.get('severidade'):
+                filter_dict['severidade'] = filters['severidade']
+            if filters.get('desenvolvedor'):
+                filter_dict['desenvolvedor'] = filters['desenvolvedor']
+        
+        # Buscar no Pinecone
+        search_params = {
+            'vector': query_embedding,
+            'top_k': top_k,
+            'include_metadata': True
+        }
+        
+        if filter_dict:
+            search_params['filter'] = filter_dict
+        
+        cache_key = (vector_hash(query_embedding), filters_key(filter_dict), top_k)
+        return search_params, cache_key
+    
+    def _process_matches(self, results, cache_key: Tuple) -> List[Dict]:
+        """Converte os matches do Pinecone e guarda no cache de resultados"""
+        bugs_encontrados = []
+        for match in results.matches:
+            bug_info = {
+                'id': match.id,
+                'score': match.score,
+                'metadata': match.metadata or {}
+            }
+            bugs_encontrados.append(bug_info)
+        
+        self.search_cache.set(cache_key, [dict(bug) for bug in bugs_encontrados])
+        logger.info(f"✅ Encontrados {len(bugs_encontrados)} bugs similares")
+        return bugs_encontrados
     
-    def search_similar_bugs(self, query: str, top_k: int = 5, filters: Optional[Dict] = None) -> List[Dict]:
+    def search_similar_bugs(self, query: str, top_k: int = 5, filters: Optional[Dict] = None,
+                            session_id: str = DEFAULT_SESSION_ID) -> List[Dict]:
         """Busca bugs similares usando embedding semântico com contexto conversacional"""
         try:
-            # Enriquecer query com contexto conversacional
-            enriched_query = self._enrich_query_with_context(query)
-            
-            # Criar embedding da query enriquecida
-            query_embedding = self.create_query_embedding(enriched_query)
+            # Criar vetor da query combinado com o contexto conversacional
+            query_embedding = self._create_search_vector(query, session_id)
             if not query_embedding:
                 return []
             
-            # Preparar filtros
-            filter_dict = {}
-            if filters:
-                if filters.get('componente'):
-                    filter_dict['componente'] = filters['componente']
-                if filters.get('severidade'):
-                    filter_dict['severidade'] = filters['severidade']
-                if filters.get('desenvolvedor'):
-                    filter_dict['desenvolvedor'] = filters['desenvolvedor']
-            
-            # Buscar no Pinecone
-            search_params = {
-                'vector': query_embedding,
-                'top_k': top_k,
-                'include_metadata': True
-            }
+            search_params, cache_key = self._prepare_search(query_embedding, top_k, filters)
             
-            if filter_dict:
-                search_params['filter'] = filter_dict
+            # Resultados recentes para o mesmo vetor/filtros/top_k vêm do cache
+            cached = self.search_cache.get(cache_key)
+            if cached is not None:
+                logger.info(f"✅ {len(cached)} bugs similares (cache)")
+                return [dict(bug) for bug in cached]
             
             results = self.index.query(**search_params)
-            
-            # Processar resultados
-            bugs_encontrados = []
-            for match in results.matches:
-                bug_info = {
-                    'id': match.id,
-                    'score': match.score,
-                    'metadata': match.metadata or {}
-                }
-                bugs_encontrados.append(bug_info)
-            
-            logger.info(f"✅ Encontrados {len(bugs_encontrados)} bugs similares")
-            return bugs_encontrados
+            return self._process_matches(results, cache_key)
             
         except Exception as e:
             logger.error(f"❌ Erro na busca: {str(e)}")
@@ -174,41 +233,14 @@ class BugRAGSystem:
     
     def build_context(self, bugs: List[Dict], max_tokens: int = 3000) -> str:
         """Constrói contexto para o LLM baseado nos bugs encontrados"""
-        if not bugs:
+        context = self.context_builder.build(bugs, max_tokens)
+        if not context:
             return "Nenhum bug relevante encontrado na base de dados."
-        
-        context_parts = ["=== BUGS RELEVANTES ENCONTRADOS ===\n"]
-        current_tokens = 0
-        
-        for i, bug in enumerate(bugs, 1):
-            metadata = bug.get('metadata', {})
-            score = bug.get('score', 0)
-            
-            bug_context = f"""
-Bug #{bug['id']} (Relevância: {score:.2f})
-- Componente: {metadata.get('componente', 'N/A')}
-- Severidade: {metadata.get('severidade', 'N/A')}
-- Desenvolvedor: {metadata.get('desenvolvedor', 'N/A')}
-- Status: {metadata.get('status_resolucao', 'N/A')}
-- Conteúdo: {metadata.get('conteudo_completo', 'N/A')[:500]}...
-
-"""
-            
-            # Estimativa simples de tokens (4 chars ≈ 1 token)
-            estimated_tokens = len(bug_context) // 4
-            
-            if current_tokens + estimated_tokens > max_tokens:
-                break
-                
-            context_parts.append(bug_context)
-            current_tokens += estimated_tokens
-        
-        return "\n".join(context_parts)
+        return context
     
-    def generate_response(self, query: str, context: str) -> str:
-        """Gera resposta usando OpenAI com o contexto dos bugs"""
-        try:
-            system_prompt = """Você é um assistente especializado em análise de bugs e desenvolvimento de software. 
+    def _build_messages(self, query: str, context: str) -> List[Dict[str, str]]:
+        """Monta as mensagens (system + user) enviadas ao LLM"""
+        system_prompt = """Você é um assistente especializado em análise de bugs e desenvolvimento de software. 
             
 Sua função é ajudar desenvolvedores e gestores a entender e resolver problemas baseado no histórico de bugs da empresa.
 
@@ -233,7 +265,7 @@ FORMATO DE RESPOSTA:
 - Bugs relevantes citados
 - Insights ou recomendações (se aplicável)"""
 
-            user_prompt = f"""
+        user_prompt = f"""
 PERGUNTA DO USUÁRIO: {query}
 
 CONTEXTO DOS BUGS:
@@ -242,12 +274,17 @@ CONTEXTO DOS BUGS:
 Por favor, responda à pergunta baseado exclusivamente nas informações dos bugs fornecidos acima.
 """
 
+        return [
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": user_prompt}
+        ]
+    
+    def generate_response(self, query: str, context: str) -> str:
+        """Gera resposta usando OpenAI com o contexto dos bugs"""
+        try:
             response = self.openai_client.chat.completions.create(
                 model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": user_prompt}
-                ],
+                messages=self._build_messages(query, context),
                 temperature=0.1,
                 max_tokens=1000
             )
@@ -258,11 +295,34 @@ Por favor, responda à pergunta baseado exclusivamente nas informações dos bug
             logger.error(f"❌ Erro ao gerar resposta: {str(e)}")
             return f"Desculpe, ocorreu um erro ao processar sua pergunta: {str(e)}"
     
-    def chat(self, query: str, filters: Optional[Dict] = None, top_k: int = 5) -> Dict[str, Any]:
+    def generate_response_stream(self, query: str, context: str) -> Iterator[str]:
+        """Gera resposta em streaming, produzindo os trechos de texto conforme chegam"""
+        try:
+            stream = self.openai_client.chat.completions.create(
+                model="gpt-4o",
+                messages=self._build_messages(query, context),
+                temperature=0.1,
+                max_tokens=1000,
+                stream=True
+            )
+            
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    yield delta
+            
+        except Exception as e:
+            logger.error(f"❌ Erro ao gerar resposta: {str(e)}")
+            yield f"Desculpe, ocorreu um erro ao processar sua pergunta: {str(e)}"
+    
+    def chat(self, query: str, filters: Optional[Dict] = None, top_k: int = 5,
+             session_id: str = DEFAULT_SESSION_ID) -> Dict[str, Any]:
         """Função principal do chat RAG com memória conversacional"""
         try:
-            # 1. Buscar bugs similares (já usa contexto conversacional)
-            bugs_similares = self.search_similar_bugs(query, top_k, filters)
+            # 1. Buscar bugs similares (já usa contexto conversacional da sessão)
+            bugs_similares = self.search_similar_bugs(query, top_k, filters, session_id)
             
             # 2. Construir contexto
             context = self.build_context(bugs_similares)
@@ -271,13 +331,13 @@ Por favor, responda à pergunta baseado exclusivamente nas informações dos bug
             response = self.generate_response(query, context)
             
             # 4. Atualizar histórico conversacional
-            self._update_conversation_history(query, response, bugs_similares)
+            history_size = self._update_conversation_history(query, response, bugs_similares, session_id)
             
             return {
                 'response': response,
                 'bugs_encontrados': bugs_similares,
                 'context_used': context,
-                'conversation_history_size': len(self.conversation_history),
+                'conversation_history_size': history_size,
                 'success': True
             }
             
@@ -290,6 +350,57 @@ Por favor, responda à pergunta baseado exclusivamente nas informações dos bug
                 'success': False
             }
     
+    def chat_stream(self, query: str, filters: Optional[Dict] = None, top_k: int = 5,
+                    session_id: str = DEFAULT_SESSION_ID) -> Iterator[Dict[str, Any]]:
+        """
+        Versão em streaming do chat. Produz eventos na ordem:
+        - {'type': 'bugs', ...}: bugs encontrados, antes da geração
+        - {'type': 'token', 'content': ...}: trechos da resposta
+        - {'type': 'done', 'metrics': ...}: tempos em ms (bugs, primeiro token, total)
+        """
+        start = time.perf_counter()
+        try:
+            bugs_similares = self.search_similar_bugs(query, top_k, filters, session_id)
+            context = self.build_context(bugs_similares)
+            
+            bugs_ms = (time.perf_counter() - start) * 1000
+            yield {
+                'type': 'bugs',
+                'bugs_encontrados': bugs_similares
+            }
+            
+            parts = []
+            first_token_ms = None
+            for token in self.generate_response_stream(query, context):
+                if first_token_ms is None:
+                    first_token_ms = (time.perf_counter() - start) * 1000
+                parts.append(token)
+                yield {'type': 'token', 'content': token}
+            
+            response = "".join(parts)
+            history_size = self._update_conversation_history(query, response, bugs_similares, session_id)
+            
+            metrics = {
+                'bugs_ms': round(bugs_ms, 1),
+                'first_token_ms': round(first_token_ms, 1) if first_token_ms is not None else None,
+                'total_ms': round((time.perf_counter() - start) * 1000, 1)
+            }
+            logger.info(f"Streaming concluído: {metrics}")
+            yield {
+                'type': 'done',
+                'success': True,
+                'conversation_history_size': history_size,
+                'metrics': metrics
+            }
+            
+        except Exception as e:
+            logger.error(f"❌ Erro no chat: {str(e)}")
+            yield {
+                'type': 'done',
+                'success': False,
+                'response': f"Desculpe, ocorreu um erro: {str(e)}"
+            }
+    
     def get_index_stats(self) -> Dict[str, Any]:
         """Obtém estatísticas do índice Pinecone"""
         try:
@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Caches da camada de recuperação do sistema RAG de bugs
+- embeddings por texto normalizado
+- resultados do Pinecone por (hash do vetor, filtros, top_k) com TTL curto
+"""
+
+import hashlib
+import math
+import re
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+
+class TTLCache:
+    """Cache LRU limitado com expiração por TTL (thread-safe)"""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            stored_at, value = item
+            if self.ttl_seconds is not None and now - stored_at > self.ttl_seconds:
+                del self._data[key]
+                self.misses += 1
+                return None
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {'size': len(self._data), 'hits': self.hits, 'misses': self.misses}
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._data)
+
+
+def normalize_text(text: str) -> str:
+    """Normaliza texto para chave de cache (minúsculas, espaços colapsados)"""
+    return re.sub(r"\s+", " ", text).strip().lower()
+
+
+def vector_hash(vector: List[float]) -> str:
+    """Hash estável de um vetor de embedding"""
+    packed = struct.pack(f"{len(vector)}f", *vector)
+    return hashlib.sha1(packed).hexdigest()
+
+
+def filters_key(filters: Optional[Dict[str, Any]]) -> Tuple:
+    """Chave hashable e independente de ordem para o dicionário de filtros"""
+    if not filters:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in filters.items()))
+
+
+def combine_vectors(query_vector: List[float], context_vector: List[float],
+                    context_weight: float) -> List[float]:
+    """Soma ponderada da query com o contexto, renormalizada (norma 1)"""
+    if not context_vector or context_weight <= 0:
+        return query_vector
+
+    combined = [q + context_weight * c for q, c in zip(query_vector, context_vector)]
+    norm = math.sqrt(sum(x * x for x in combined))
+    if norm == 0:
+        return query_vector
+    return [x / norm for x in combined]
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+"""
+Memória conversacional por sessão para o sistema RAG de bugs
+Cada sessão tem seu próprio histórico, com LRU limitado e expiração por TTL
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import List
+
+DEFAULT_SESSION_ID = "default"
+
+
+class ConversationMemory:
+    """Histórico conversacional de uma única sessão (thread-safe)"""
+
+    def __init__(self, max_history_length: int = 10):
+        self.max_history_length = max_history_length
+        self.last_access = time.monotonic()
+        self._history: List[str] = []
+        self._lock = threading.Lock()
+
+    def append(self, interaction: str) -> int:
+        """Adiciona uma interação e retorna o tamanho atual do histórico"""
+        with self._lock:
+            self._history.append(interaction)
+            if len(self._history) > self.max_history_length:
+                self._history = self._history[-self.max_history_length:]
+            return len(self._history)
+
+    def recent(self, n: int) -> List[str]:
+        """Retorna cópia das últimas n interações"""
+        with self._lock:
+            return list(self._history[-n:]) if n > 0 else []
+
+    def snapshot(self) -> List[str]:
+        """Retorna cópia completa do histórico"""
+        with self._lock:
+            return list(self._history)
+
+    def clear(self):
+        with self._lock:
+            self._history = []
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._history)
+
+
+class SessionMemoryStore:
+    """
+    Armazena memórias por session_id
+    - LRU limitado a max_sessions (a sessão menos usada é descartada)
+    - Sessões inativas por mais de ttl_seconds expiram
+    """
+
+    def __init__(self, max_sessions: int = 1000, ttl_seconds: float = 3600,
+                 max_history_length: int = 10):
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_history_length = max_history_length
+        self._sessions: "OrderedDict[str, ConversationMemory]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _evict_expired(self, now: float):
+        """Remove sessões expiradas (chamado com o lock adquirido)"""
+        # Ordem LRU: as mais antigas ficam no início
+        while self._sessions:
+            session_id, memory = next(iter(self._sessions.items()))
+            if now - memory.last_access <= self.ttl_seconds:
+                break
+            del self._sessions[session_id]
+
+    def get(self, session_id: str = DEFAULT_SESSION_ID) -> ConversationMemory:
+        """Retorna (ou cria) a memória da sessão, marcando-a como usada"""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            memory = self._sessions.get(session_id)
+            if memory is None:
+                memory = ConversationMemory(self.max_history_length)
+                self._sessions[session_id] = memory
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            else:
+                self._sessions.move_to_end(session_id)
+            memory.last_access = now
+            return memory
+
+    def clear(self, session_id: str = DEFAULT_SESSION_ID):
+        """Descarta a memória da sessão"""
+        with self._lock:
+            self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._evict_expired(time.monotonic())
+            return len(self._sessions)
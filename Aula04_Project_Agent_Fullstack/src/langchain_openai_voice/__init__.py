@@ -1,10 +1,21 @@
 import asyncio
+import functools
 import json
+import os
+import time
 import websockets
 
-from contextlib import asynccontextmanager
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import AsyncExitStack, asynccontextmanager
 from typing import AsyncGenerator, AsyncIterator, Any, Callable, Coroutine
-from langchain_openai_voice.utils import amerge
+from langchain_openai_voice.pool import RealtimeSession, RealtimeSessionPool
+from langchain_openai_voice.relay import (
+    AudioRelayConfig,
+    OutboundRelay,
+    coalesce_input_audio,
+    is_audio_delta,
+)
+from langchain_openai_voice.utils import amerge, tool_latency
 
 from langchain_core.tools import BaseTool
 from langchain_core._api import beta
@@ -30,14 +41,23 @@ EVENTS_TO_IGNORE = {
     "response.output_item.done",
 }
 
+# Bounded pool shared by all sessions for tools without a native coroutine
+# (blocking pymongo/OpenAI calls), so they never run on the event loop that
+# is also pumping audio frames.
+TOOL_THREAD_POOL = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("VOICE_TOOL_MAX_WORKERS", "8")),
+    thread_name_prefix="voice-tool",
+)
+DEFAULT_TOOL_TIMEOUT = 30.0
+
 
 @asynccontextmanager
 async def connect(
-    *, api_key: str, model: str, url: str
+    *, api_key: str, model: str, url: str, raw: bool = False
 ) -> AsyncGenerator[
     tuple[
         Callable[[dict[str, Any] | str], Coroutine[Any, Any, None]],
-        AsyncIterator[dict[str, Any]],
+        AsyncIterator[dict[str, Any] | str],
     ],
     None,
 ]:
@@ -46,6 +66,8 @@ async def connect(
         await websocket.send("Hello, world!")
         async for message in websocket:
             print(message)
+
+    With raw=True the event stream yields the undecoded JSON strings.
     """
 
     headers = {
@@ -64,11 +86,11 @@ async def connect(
             formatted_event = json.dumps(event) if isinstance(event, dict) else event
             await websocket.send(formatted_event)
 
-        async def event_stream() -> AsyncIterator[dict[str, Any]]:
+        async def event_stream() -> AsyncIterator[dict[str, Any] | str]:
             async for raw_event in websocket:
-                yield json.loads(raw_event)
+                yield raw_event if raw else json.loads(raw_event)
 
-        stream: AsyncIterator[dict[str, Any]] = event_stream()
+        stream: AsyncIterator[dict[str, Any] | str] = event_stream()
 
         yield send_event, stream
     finally:
@@ -78,24 +100,39 @@ async def connect(
 class VoiceToolExecutor(BaseModel):
     """
     Can accept function calls and emits function call outputs to a stream.
+
+    Any number of tool calls can be added at once; they are queued, run in
+    parallel (at most `max_concurrency` at a time) and their outputs are
+    emitted in completion order.
     """
 
     tools_by_name: dict[str, BaseTool]
-    _trigger_future: asyncio.Future = PrivateAttr(default_factory=asyncio.Future)
-    _lock: asyncio.Lock = PrivateAttr(default_factory=asyncio.Lock)
+    tool_timeout: float = DEFAULT_TOOL_TIMEOUT
+    tool_timeouts: dict[str, float] = Field(default_factory=dict)
+    max_concurrency: int = 4
+    _queue: asyncio.Queue = PrivateAttr(default_factory=asyncio.Queue)
+    _semaphore: asyncio.Semaphore = PrivateAttr()
+    _pending: int = PrivateAttr(default=0)
+
+    def model_post_init(self, __context: Any) -> None:
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
 
-    async def _trigger_func(self) -> dict:  # returns a tool call
-        return await self._trigger_future
+    @property
+    def pending(self) -> int:
+        """Tool calls added whose output has not been emitted yet."""
+        return self._pending
 
     async def add_tool_call(self, tool_call: dict) -> None:
-        # lock to avoid simultaneous tool calls racing and missing
-        # _trigger_future being
-        async with self._lock:
-            if self._trigger_future.done():
-                # TODO: handle simultaneous tool calls better
-                raise ValueError("Tool call adding already in progress")
+        self._pending += 1
+        self._queue.put_nowait(tool_call)
 
-            self._trigger_future.set_result(tool_call)
+    async def _invoke_tool(self, tool: BaseTool, args: dict) -> Any:
+        if getattr(tool, "coroutine", None) is not None:
+            return await tool.ainvoke(args)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            TOOL_THREAD_POOL, functools.partial(tool.invoke, args)
+        )
 
     async def _create_tool_call_task(self, tool_call: dict) -> asyncio.Task[dict]:
         tool = self.tools_by_name.get(tool_call["name"])
@@ -114,13 +151,36 @@ class VoiceToolExecutor(BaseModel):
                 f"failed to parse arguments `{tool_call['arguments']}`. Must be valid JSON."
             )
 
+        timeout = self.tool_timeouts.get(tool.name, self.tool_timeout)
+
         async def run_tool() -> dict:
-            result = await tool.ainvoke(args)
+            async with self._semaphore:
+                return await run_tool_unbounded()
+
+        async def run_tool_unbounded() -> dict:
+            start = time.perf_counter()
+            status = "ok"
             try:
-                result_str = json.dumps(result)
-            except TypeError:
-                # not json serializable, use str
-                result_str = str(result)
+                # a timed out thread keeps running, but the model gets an
+                # answer and the conversation moves on
+                result = await asyncio.wait_for(
+                    self._invoke_tool(tool, args), timeout=timeout
+                )
+                try:
+                    result_str = json.dumps(result)
+                except TypeError:
+                    # not json serializable, use str
+                    result_str = str(result)
+            except asyncio.TimeoutError:
+                status = "timeout"
+                result_str = f"Error: tool {tool.name} timed out after {timeout}s"
+            except Exception as e:
+                status = "error"
+                result_str = f"Error: {str(e)}"
+            finally:
+                tool_latency.observe(
+                    tool.name, (time.perf_counter() - start) * 1000, status
+                )
             return {
                 "type": "conversation.item.create",
                 "item": {
@@ -135,33 +195,40 @@ class VoiceToolExecutor(BaseModel):
         return task
 
     async def output_iterator(self) -> AsyncIterator[dict]:  # yield events
-        trigger_task = asyncio.create_task(self._trigger_func())
+        trigger_task = asyncio.create_task(self._queue.get())
         tasks = set([trigger_task])
-        while True:
-            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
-            for task in done:
-                tasks.remove(task)
-                if task == trigger_task:
-                    async with self._lock:
-                        self._trigger_future = asyncio.Future()
-                    trigger_task = asyncio.create_task(self._trigger_func())
-                    tasks.add(trigger_task)
-                    tool_call = task.result()
-                    try:
-                        new_task = await self._create_tool_call_task(tool_call)
-                        tasks.add(new_task)
-                    except ValueError as e:
-                        yield {
-                            "type": "conversation.item.create",
-                            "item": {
-                                "id": tool_call["call_id"],
-                                "call_id": tool_call["call_id"],
-                                "type": "function_call_output",
-                                "output": (f"Error: {str(e)}"),
-                            },
-                        }
-                else:
-                    yield task.result()
+        try:
+            while True:
+                done, _ = await asyncio.wait(
+                    tasks, return_when=asyncio.FIRST_COMPLETED
+                )
+                for task in done:
+                    tasks.remove(task)
+                    if task == trigger_task:
+                        trigger_task = asyncio.create_task(self._queue.get())
+                        tasks.add(trigger_task)
+                        tool_call = task.result()
+                        try:
+                            new_task = await self._create_tool_call_task(tool_call)
+                            tasks.add(new_task)
+                        except ValueError as e:
+                            self._pending -= 1
+                            yield {
+                                "type": "conversation.item.create",
+                                "item": {
+                                    "id": tool_call["call_id"],
+                                    "call_id": tool_call["call_id"],
+                                    "type": "function_call_output",
+                                    "output": (f"Error: {str(e)}"),
+                                },
+                            }
+                    else:
+                        self._pending -= 1
+                        yield task.result()
+        finally:
+            # session closed: stop waiting for calls and abandon running tools
+            for task in tasks:
+                task.cancel()
 
 
 @beta()
@@ -174,34 +241,25 @@ class OpenAIVoiceReactAgent(BaseModel):
     instructions: str | None = None
     tools: list[BaseTool] | None = None
     url: str = Field(default=DEFAULT_URL)
+    tool_timeout: float = DEFAULT_TOOL_TIMEOUT
+    max_parallel_tool_calls: int = 4
+    audio_relay: AudioRelayConfig = Field(default_factory=AudioRelayConfig)
 
-    async def aconnect(
-        self,
-        input_stream: AsyncIterator[str],
-        send_output_chunk: Callable[[str], Coroutine[Any, Any, None]],
-    ) -> None:
+    async def open_session(self) -> RealtimeSession:
         """
-        Connect to the OpenAI API and send and receive messages.
-
-        input_stream: AsyncIterator[str]
-            Stream of input events to send to the model. Usually transports input_audio_buffer.append events from the microphone.
-        output: Callable[[str], None]
-            Callback to receive output events from the model. Usually sends response.audio.delta events to the speaker.
-
+        Open a realtime connection and send the session.update with the
+        instructions and tool definitions, ready to be used by aconnect.
         """
-        # formatted_tools: list[BaseTool] = [
-        #     tool if isinstance(tool, BaseTool) else tool_converter.wr(tool)  # type: ignore
-        #     for tool in self.tools or []
-        # ]
-        tools_by_name = {tool.name: tool for tool in self.tools}
-        tool_executor = VoiceToolExecutor(tools_by_name=tools_by_name)
-
-        async with connect(
-            model=self.model, api_key=self.api_key.get_secret_value(), url=self.url
-        ) as (
-            model_send,
-            model_receive_stream,
-        ):
+        exit_stack = AsyncExitStack()
+        try:
+            model_send, model_receive_stream = await exit_stack.enter_async_context(
+                connect(
+                    model=self.model,
+                    api_key=self.api_key.get_secret_value(),
+                    url=self.url,
+                    raw=self.audio_relay.passthrough,
+                )
+            )
             # sent tools and instructions with initial chunk
             tool_defs = [
                 {
@@ -210,7 +268,7 @@ class OpenAIVoiceReactAgent(BaseModel):
                     "description": tool.description,
                     "parameters": {"type": "object", "properties": tool.args},
                 }
-                for tool in tools_by_name.values()
+                for tool in self.tools or []
             ]
             await model_send(
                 {
@@ -224,11 +282,72 @@ class OpenAIVoiceReactAgent(BaseModel):
                     },
                 }
             )
+        except BaseException:
+            await exit_stack.aclose()
+            raise
+        return RealtimeSession(model_send, model_receive_stream, exit_stack)
+
+    def session_pool(
+        self, size: int = 2, max_idle_seconds: float = 240.0
+    ) -> RealtimeSessionPool:
+        """Pool of warm sessions for this agent, to pass to aconnect."""
+        return RealtimeSessionPool(
+            self.open_session, size=size, max_idle_seconds=max_idle_seconds
+        )
+
+    async def aconnect(
+        self,
+        input_stream: AsyncIterator[str],
+        send_output_chunk: Callable[[str], Coroutine[Any, Any, None]],
+        session: RealtimeSession | None = None,
+    ) -> None:
+        """
+        Connect to the OpenAI API and send and receive messages.
+
+        input_stream: AsyncIterator[str]
+            Stream of input events to send to the model. Usually transports input_audio_buffer.append events from the microphone.
+        output: Callable[[str], None]
+            Callback to receive output events from the model. Usually sends response.audio.delta events to the speaker.
+        session: RealtimeSession | None
+            Already opened session (e.g. from a RealtimeSessionPool). A new one is opened when omitted. It is closed on return.
+
+        """
+        # formatted_tools: list[BaseTool] = [
+        #     tool if isinstance(tool, BaseTool) else tool_converter.wr(tool)  # type: ignore
+        #     for tool in self.tools or []
+        # ]
+        tools_by_name = {tool.name: tool for tool in self.tools}
+        tool_executor = VoiceToolExecutor(
+            tools_by_name=tools_by_name,
+            tool_timeout=self.tool_timeout,
+            max_concurrency=self.max_parallel_tool_calls,
+        )
+
+        relay = self.audio_relay
+        if relay.coalesce_input:
+            input_stream = coalesce_input_audio(input_stream, relay)
+
+        if session is None:
+            session = await self.open_session()
+        model_send, model_receive_stream = session.send, session.stream
+
+        async with session, OutboundRelay(
+            send_output_chunk, relay.outbound_queue_size
+        ) as outbound:
             async for stream_key, data_raw in amerge(
                 input_mic=input_stream,
                 output_speaker=model_receive_stream,
                 tool_outputs=tool_executor.output_iterator(),
             ):
+                # audio needs no inspection: forward the raw strings as-is
+                if relay.passthrough and isinstance(data_raw, str):
+                    if stream_key == "input_mic":
+                        await model_send(data_raw)
+                        continue
+                    if stream_key == "output_speaker" and is_audio_delta(data_raw):
+                        outbound.put_audio(data_raw)
+                        continue
+
                 try:
                     data = (
                         json.loads(data_raw) if isinstance(data_raw, str) else data_raw
@@ -242,14 +361,17 @@ class OpenAIVoiceReactAgent(BaseModel):
                 elif stream_key == "tool_outputs":
                     print("tool output", data)
                     await model_send(data)
-                    await model_send({"type": "response.create", "response": {}})
+                    # with parallel calls, ask for a response once all are answered
+                    if tool_executor.pending == 0:
+                        await model_send({"type": "response.create", "response": {}})
                 elif stream_key == "output_speaker":
                     t = data["type"]
                     if t == "response.audio.delta":
-                        await send_output_chunk(json.dumps(data))
+                        outbound.put_audio(json.dumps(data))
                     elif t == "response.audio_buffer.speech_started":
                         print("interrupt")
-                        send_output_chunk(json.dumps(data))
+                        # stale audio of the interrupted response must not play first
+                        outbound.interrupt(json.dumps(data))
                     elif t == "error":
                         print("error:", data)
                     elif t == "response.function_call_arguments.done":
@@ -265,4 +387,9 @@ class OpenAIVoiceReactAgent(BaseModel):
                         print(t)
 
 
-__all__ = ["OpenAIVoiceReactAgent"]
+__all__ = [
+    "OpenAIVoiceReactAgent",
+    "AudioRelayConfig",
+    "RealtimeSession",
+    "RealtimeSessionPool",
+]
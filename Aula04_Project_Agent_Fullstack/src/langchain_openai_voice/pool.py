@@ -0,0 +1,123 @@
+import asyncio
+import time
+from collections import deque
+from contextlib import AsyncExitStack
+from typing import Any, AsyncIterator, Awaitable, Callable, Coroutine
+
+
+class RealtimeSession:
+    """
+    An open, already configured (session.update sent) realtime connection.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[dict[str, Any] | str], Coroutine[Any, Any, None]],
+        stream: AsyncIterator[dict[str, Any] | str],
+        exit_stack: AsyncExitStack,
+    ):
+        self.send = send
+        self.stream = stream
+        self.created_at = time.monotonic()
+        self._exit_stack = exit_stack
+
+    @property
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    async def aclose(self) -> None:
+        await self._exit_stack.aclose()
+
+    async def __aenter__(self) -> "RealtimeSession":
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        await self.aclose()
+
+
+class RealtimeSessionPool:
+    """
+    Keeps `size` warm realtime sessions so a browser connection can start
+    talking without waiting for the TLS handshake and session.update.
+
+    Sessions are handed out once and never reused; the pool is replenished in
+    the background. Sessions idle for longer than `max_idle_seconds` are
+    discarded, since the realtime API expires long-lived sessions.
+    """
+
+    def __init__(
+        self,
+        open_session: Callable[[], Awaitable[RealtimeSession]],
+        size: int = 2,
+        max_idle_seconds: float = 240.0,
+        retry_delay: float = 5.0,
+    ):
+        self._open_session = open_session
+        self.size = size
+        self.max_idle_seconds = max_idle_seconds
+        self.retry_delay = retry_delay
+        self._idle: deque[RealtimeSession] = deque()
+        self._wakeup = asyncio.Event()
+        self._filler: asyncio.Task | None = None
+        self.warm_hits = 0
+        self.cold_starts = 0
+        self.discarded = 0
+
+    async def start(self) -> None:
+        self._filler = asyncio.create_task(self._fill())
+
+    async def close(self) -> None:
+        if self._filler is not None:
+            self._filler.cancel()
+            try:
+                await self._filler
+            except asyncio.CancelledError:
+                pass
+        while self._idle:
+            await self._idle.popleft().aclose()
+
+    async def _discard(self, session: RealtimeSession) -> None:
+        self.discarded += 1
+        try:
+            await session.aclose()
+        except Exception:
+            pass
+
+    async def _fill(self) -> None:
+        while True:
+            while self._idle and self._idle[0].age > self.max_idle_seconds:
+                await self._discard(self._idle.popleft())
+            if len(self._idle) < self.size:
+                try:
+                    self._idle.append(await self._open_session())
+                except Exception as e:
+                    print("error warming realtime session:", e)
+                    await asyncio.sleep(self.retry_delay)
+                continue
+            self._wakeup.clear()
+            try:
+                # wake up on acquire, or in time to expire the oldest session
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.max_idle_seconds)
+            except asyncio.TimeoutError:
+                pass
+
+    async def acquire(self) -> RealtimeSession:
+        """Returns a warm session if one is available, otherwise opens one."""
+        while self._idle:
+            session = self._idle.popleft()
+            self._wakeup.set()
+            if session.age <= self.max_idle_seconds:
+                self.warm_hits += 1
+                return session
+            asyncio.create_task(self._discard(session))
+        self.cold_starts += 1
+        return await self._open_session()
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "size": self.size,
+            "idle": len(self._idle),
+            "warm_hits": self.warm_hits,
+            "cold_starts": self.cold_starts,
+            "discarded": self.discarded,
+        }
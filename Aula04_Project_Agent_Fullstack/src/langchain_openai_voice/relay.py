@@ -0,0 +1,185 @@
+import asyncio
+import base64
+import json
+from collections import deque
+from typing import Any, AsyncIterator, Callable, Coroutine
+
+from pydantic import BaseModel
+
+APPEND_PREFIX = '{"type":"input_audio_buffer.append"'
+AUDIO_DELTA_TYPE = '"type":"response.audio.delta"'
+AUDIO_FIELD = '"audio":"'
+
+
+class AudioRelayConfig(BaseModel):
+    """
+    How audio is relayed between the browser and the realtime API.
+
+    The defaults coalesce the browser's tiny microphone frames (128 samples
+    each) into ~40ms chunks, forward audio without a JSON decode/encode round
+    trip and bound the queue of chunks waiting for a slow browser socket.
+    """
+
+    coalesce_input: bool = True
+    # 40ms of pcm16 mono at 24kHz
+    coalesce_max_bytes: int = 1920
+    coalesce_max_delay_ms: float = 40.0
+    passthrough: bool = True
+    outbound_queue_size: int = 256
+
+
+def is_input_append(raw: str) -> bool:
+    return raw.startswith(APPEND_PREFIX)
+
+
+def is_audio_delta(raw: str) -> bool:
+    # "type" is the first key sent by the realtime API
+    return raw.find(AUDIO_DELTA_TYPE, 0, 64) != -1
+
+
+def _extract_audio(raw: str) -> str:
+    start = raw.find(AUDIO_FIELD)
+    if start != -1:
+        start += len(AUDIO_FIELD)
+        end = raw.find('"', start)
+        if end != -1:
+            return raw[start:end]
+    return json.loads(raw)["audio"]
+
+
+def _append_event(audio: bytes) -> str:
+    return (
+        f'{APPEND_PREFIX},"audio":"{base64.b64encode(audio).decode("ascii")}"}}'
+    )
+
+
+async def coalesce_input_audio(
+    input_stream: AsyncIterator[str], config: AudioRelayConfig
+) -> AsyncIterator[str]:
+    """
+    Merge consecutive input_audio_buffer.append frames until coalesce_max_bytes
+    or coalesce_max_delay_ms is reached. Other events flush pending audio and
+    are passed through untouched.
+    """
+    loop = asyncio.get_running_loop()
+    pending: list[bytes] = []
+    pending_bytes = 0
+    deadline = 0.0
+    max_delay = config.coalesce_max_delay_ms / 1000
+    next_item = asyncio.ensure_future(anext(input_stream))
+
+    def flush() -> str:
+        nonlocal pending, pending_bytes
+        event = _append_event(b"".join(pending))
+        pending, pending_bytes = [], 0
+        return event
+
+    try:
+        while True:
+            if pending:
+                timeout = max(deadline - loop.time(), 0)
+                done, _ = await asyncio.wait({next_item}, timeout=timeout)
+                if not done:
+                    yield flush()
+                    continue
+            try:
+                raw = await next_item
+            except StopAsyncIteration:
+                break
+            next_item = asyncio.ensure_future(anext(input_stream))
+
+            if not is_input_append(raw):
+                if pending:
+                    yield flush()
+                yield raw
+                continue
+
+            chunk = base64.b64decode(_extract_audio(raw))
+            if not pending:
+                deadline = loop.time() + max_delay
+            pending.append(chunk)
+            pending_bytes += len(chunk)
+            if pending_bytes >= config.coalesce_max_bytes:
+                yield flush()
+        if pending:
+            yield flush()
+    finally:
+        next_item.cancel()
+
+
+class OutboundRelay:
+    """
+    Bounded queue in front of the browser socket. When the browser falls
+    behind, the oldest queued audio chunks are dropped instead of letting
+    latency grow without limit or stalling the loop that reads the model
+    stream. Control events are never dropped, and interrupt() discards the
+    queued audio and sends the interrupt ahead of everything else.
+    """
+
+    def __init__(
+        self,
+        send: Callable[[str], Coroutine[Any, Any, None]],
+        maxsize: int,
+    ):
+        self._send = send
+        self._maxsize = maxsize
+        # (message, is_audio) in send order
+        self._queue: deque[tuple[str, bool]] = deque()
+        self._audio = 0
+        self._ready = asyncio.Event()
+        self.dropped = 0
+        self.sent = 0
+        self._task: asyncio.Task | None = None
+
+    def put_audio(self, message: str) -> None:
+        """Queue a response.audio.delta frame, dropping the oldest queued frame when full."""
+        if self._audio >= self._maxsize:
+            self._drop_oldest_audio()
+        self._queue.append((message, True))
+        self._audio += 1
+        self._ready.set()
+
+    def put(self, message: str) -> None:
+        """Queue a control event; it is never dropped."""
+        self._queue.append((message, False))
+        self._ready.set()
+
+    def interrupt(self, message: str) -> None:
+        """Drop all queued audio and send message before any other queued event."""
+        self.dropped += self._audio
+        self._queue = deque(item for item in self._queue if not item[1])
+        self._audio = 0
+        self._queue.appendleft((message, False))
+        self._ready.set()
+
+    def _drop_oldest_audio(self) -> None:
+        for i, (_, is_audio) in enumerate(self._queue):
+            if is_audio:
+                del self._queue[i]
+                self._audio -= 1
+                self.dropped += 1
+                return
+
+    async def _run(self) -> None:
+        while True:
+            if not self._queue:
+                self._ready.clear()
+                await self._ready.wait()
+                continue
+            message, is_audio = self._queue.popleft()
+            if is_audio:
+                self._audio -= 1
+            await self._send(message)
+            self.sent += 1
+
+    async def __aenter__(self) -> "OutboundRelay":
+        self._task = asyncio.create_task(self._run())
+        return self
+
+    async def __aexit__(self, *exc_info: Any) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
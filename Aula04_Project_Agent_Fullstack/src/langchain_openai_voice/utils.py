@@ -1,5 +1,5 @@
 import asyncio
-from typing import AsyncIterator, TypeVar
+from typing import Any, AsyncIterator, TypeVar
 
 T = TypeVar("T")
 
@@ -23,3 +23,55 @@ async def amerge(**streams: AsyncIterator[T]) -> AsyncIterator[tuple[str, T]]:
                 for task in nexts:
                     task.cancel()
                 raise e
+
+
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, float("inf"))
+
+
+class ToolLatencyHistogram:
+    """Per-tool latency histogram (cumulative buckets in ms, like Prometheus)."""
+
+    def __init__(self, buckets_ms: tuple[float, ...] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = buckets_ms
+        self._tools: dict[str, dict[str, Any]] = {}
+
+    def _entry(self, tool_name: str) -> dict[str, Any]:
+        if tool_name not in self._tools:
+            self._tools[tool_name] = {
+                "count": 0,
+                "sum_ms": 0.0,
+                "errors": 0,
+                "timeouts": 0,
+                "buckets": [0] * len(self.buckets_ms),
+            }
+        return self._tools[tool_name]
+
+    def observe(self, tool_name: str, latency_ms: float, status: str = "ok") -> None:
+        entry = self._entry(tool_name)
+        entry["count"] += 1
+        entry["sum_ms"] += latency_ms
+        if status == "timeout":
+            entry["timeouts"] += 1
+        elif status == "error":
+            entry["errors"] += 1
+        for i, upper in enumerate(self.buckets_ms):
+            if latency_ms <= upper:
+                entry["buckets"][i] += 1
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            name: {
+                "count": entry["count"],
+                "avg_ms": entry["sum_ms"] / entry["count"] if entry["count"] else 0.0,
+                "errors": entry["errors"],
+                "timeouts": entry["timeouts"],
+                "buckets_ms": {
+                    ("+Inf" if upper == float("inf") else str(upper)): count
+                    for upper, count in zip(self.buckets_ms, entry["buckets"])
+                },
+            }
+            for name, entry in self._tools.items()
+        }
+
+
+tool_latency = ToolLatencyHistogram()
@@ -1,7 +1,10 @@
 import uvicorn
 import os
+import time
+from collections import deque
+from contextlib import asynccontextmanager
 from starlette.applications import Starlette
-from starlette.responses import HTMLResponse
+from starlette.responses import HTMLResponse, JSONResponse
 from starlette.routing import Route, WebSocketRoute
 from starlette.staticfiles import StaticFiles
 from starlette.websockets import WebSocket
@@ -12,6 +15,7 @@ import sys
 # Adicionar o diretório src ao PYTHONPATH
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from langchain_openai_voice import OpenAIVoiceReactAgent
+from langchain_openai_voice.utils import tool_latency
 
 
 from server.utils import websocket_stream
@@ -22,23 +26,58 @@ from server.tools import TOOLS
 load_dotenv(override=True)
 
 
-async def websocket_endpoint(websocket: WebSocket):
-    await websocket.accept()
-
-    browser_receive_stream = websocket_stream(websocket)
-
+def create_agent() -> OpenAIVoiceReactAgent:
     # Obter a API key diretamente do ambiente
     api_key = os.environ.get("OPENAI_API_KEY")
     print(f"Usando API key: {api_key[:10]}...{api_key[-5:]}")
-    
-    agent = OpenAIVoiceReactAgent(
+
+    return OpenAIVoiceReactAgent(
         model="gpt-4o-realtime-preview-2024-10-01",
         tools=TOOLS,
         instructions=INSTRUCTIONS,
         openai_api_key=api_key,  # Passar explicitamente a API key
     )
 
-    await agent.aconnect(browser_receive_stream, websocket.send_text)
+
+agent = create_agent()
+# Sessões realtime já conectadas e configuradas, entregues quando o navegador conecta
+session_pool = agent.session_pool(
+    size=int(os.environ.get("REALTIME_POOL_SIZE", "2")),
+    max_idle_seconds=float(os.environ.get("REALTIME_POOL_MAX_IDLE", "240")),
+)
+# Tempos recentes (ms) desde o accept do websocket até a sessão pronta e o primeiro áudio
+startup_timings = deque(maxlen=200)
+
+
+def summarize(values: list[float]) -> dict:
+    if not values:
+        return {}
+    values = sorted(values)
+    return {
+        "avg_ms": sum(values) / len(values),
+        "p95_ms": values[min(len(values) - 1, int(len(values) * 0.95))],
+    }
+
+
+async def websocket_endpoint(websocket: WebSocket):
+    await websocket.accept()
+    accepted_at = time.perf_counter()
+    timings = {"session_ready_ms": None, "first_audio_ms": None}
+    startup_timings.append(timings)
+
+    browser_receive_stream = websocket_stream(websocket)
+
+    session = await session_pool.acquire()
+    timings["session_ready_ms"] = (time.perf_counter() - accepted_at) * 1000
+
+    async def send_output_chunk(chunk: str) -> None:
+        if timings["first_audio_ms"] is None:
+            timings["first_audio_ms"] = (time.perf_counter() - accepted_at) * 1000
+            print(f"startup: sessão {timings['session_ready_ms']:.0f}ms, "
+                  f"primeiro áudio {timings['first_audio_ms']:.0f}ms")
+        await websocket.send_text(chunk)
+
+    await agent.aconnect(browser_receive_stream, send_output_chunk, session=session)
 
 
 async def homepage(request):
@@ -47,12 +86,41 @@ async def homepage(request):
         return HTMLResponse(html)
 
 
+async def tool_metrics(request):
+    # latency histogram per tool, collected by VoiceToolExecutor
+    return JSONResponse(tool_latency.snapshot())
+
+
+async def session_metrics(request):
+    return JSONResponse({
+        "pool": session_pool.stats(),
+        "session_ready": summarize(
+            [t["session_ready_ms"] for t in startup_timings if t["session_ready_ms"] is not None]
+        ),
+        "first_audio": summarize(
+            [t["first_audio_ms"] for t in startup_timings if t["first_audio_ms"] is not None]
+        ),
+    })
+
+
+@asynccontextmanager
+async def lifespan(app):
+    await session_pool.start()
+    yield
+    await session_pool.close()
+
+
 # catchall route to load files from src/server/static
 
 
-routes = [Route("/", homepage), WebSocketRoute("/ws", websocket_endpoint)]
+routes = [
+    Route("/", homepage),
+    Route("/metrics/tools", tool_metrics),
+    Route("/metrics/sessions", session_metrics),
+    WebSocketRoute("/ws", websocket_endpoint),
+]
 
-app = Starlette(debug=True, routes=routes)
+app = Starlette(debug=True, routes=routes, lifespan=lifespan)
 
 app.mount("/", StaticFiles(directory="src/server/static"), name="static")
 
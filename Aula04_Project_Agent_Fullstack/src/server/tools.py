@@ -1,10 +1,13 @@
 from langchain_core.tools import tool
+from langchain_core.embeddings import Embeddings
 from langchain_mongodb import MongoDBAtlasVectorSearch
 from langchain.embeddings import OpenAIEmbeddings
-from typing import Dict, Any
+from typing import Dict, Any, List
+from collections import OrderedDict
 from pydantic import BaseModel, Field
 from datetime import datetime
 import os
+import threading
 from dotenv import load_dotenv
 import json
 from pymongo import MongoClient
@@ -18,9 +21,60 @@ client = MongoClient(
 )
 
 
+class CachedQueryEmbeddings(Embeddings):
+    """
+    Wraps an embeddings model and keeps an LRU cache of query embeddings, so a
+    repeated search during a call skips the embeddings API round trip.
+
+    Only the cache key is normalized (whitespace collapsed, lowercased); the
+    embeddings API always receives the query text as given.
+    """
+
+    def __init__(self, embeddings: Embeddings, maxsize: int = 256):
+        self.embeddings = embeddings
+        self.maxsize = maxsize
+        self._cache: OrderedDict[str, List[float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def cache_key(text: str) -> str:
+        return " ".join(text.split()).lower()
+
+    def embed_query(self, text: str) -> List[float]:
+        key = self.cache_key(text)
+        with self._lock:
+            embedding = self._cache.get(key)
+            if embedding is not None:
+                self._cache.move_to_end(key)
+                return list(embedding)
+        embedding = self.embeddings.embed_query(text)
+        with self._lock:
+            self._cache[key] = embedding
+            self._cache.move_to_end(key)
+            while len(self._cache) > self.maxsize:
+                self._cache.popitem(last=False)
+        return list(embedding)
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embeddings.embed_documents(texts)
+
+
 # Initialize OpenAI embeddings with text-embedding-3-small model
-embedding_model = OpenAIEmbeddings(
-    model="text-embedding-3-small", openai_api_key=os.environ["OPENAI_API_KEY"]
+embedding_model = CachedQueryEmbeddings(
+    OpenAIEmbeddings(
+        model="text-embedding-3-small", openai_api_key=os.environ["OPENAI_API_KEY"]
+    ),
+    maxsize=int(os.environ.get("QUERY_EMBEDDING_CACHE_SIZE", "256")),
+)
+
+# Vector store built once per process on top of the shared MongoClient,
+# instead of a new client and connection pool per search
+vector_store = MongoDBAtlasVectorSearch(
+    collection=client["ai_airbnb"]["rentals"],
+    embedding=embedding_model,
+    embedding_key="text_embeddings",
+    text_key="description",
+    index_name="vector_index",
 )
 
 
@@ -50,15 +104,6 @@ def rentlas_search_tool(query: str, k: int = 5):
     Note:
         Uses MongoDB Atlas Vector Search for semantic search capabilities.
     """
-    vector_store = MongoDBAtlasVectorSearch.from_connection_string(
-        connection_string=os.environ["MONGODB_ATLAS_URI"],
-        namespace="ai_airbnb.rentals",
-        embedding_key="text_embeddings",
-        text_key="description",
-        index_name="vector_index",
-        embedding=embedding_model,
-    )
-
     vector_search_results = vector_store.similarity_search_with_score(query=query, k=k)
     return vector_search_results
 
@@ -0,0 +1,113 @@
+"""
+Benchmark of the audio relay in OpenAIVoiceReactAgent.aconnect against a
+local fake realtime server.
+
+The browser side pushes N microphone frames (128 pcm16 samples each, as sent
+by audio-processor-worklet.js) as fast as possible while the fake server
+streams M response.audio.delta events back. Reports messages/sec in each
+direction, how many messages actually reached the server, and the average
+relay overhead per frame, for the legacy path (decode/encode every message,
+no coalescing) and the default relay config.
+
+Usage:
+    python tests/benchmark_audio_relay.py --frames 5000 --deltas 2000
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import sys
+import time
+
+import websockets
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "src")))
+from langchain_openai_voice import AudioRelayConfig, OpenAIVoiceReactAgent  # noqa: E402
+
+MIC_FRAME = base64.b64encode(os.urandom(256)).decode("ascii")
+SPEAKER_DELTA = base64.b64encode(os.urandom(4800)).decode("ascii")
+
+
+async def run_case(name: str, relay: AudioRelayConfig, frames: int, deltas: int) -> None:
+    received = {"messages": 0, "audio_bytes": 0}
+    input_done = asyncio.Event()
+    expected_bytes = frames * 256
+
+    async def fake_realtime(websocket):
+        async for raw in websocket:
+            event = json.loads(raw)
+            if event["type"] == "session.update":
+                for i in range(deltas):
+                    await websocket.send(json.dumps({
+                        "type": "response.audio.delta",
+                        "event_id": f"event_{i}",
+                        "response_id": "resp_1",
+                        "item_id": "item_1",
+                        "output_index": 0,
+                        "content_index": 0,
+                        "delta": SPEAKER_DELTA,
+                    }))
+            elif event["type"] == "input_audio_buffer.append":
+                received["messages"] += 1
+                received["audio_bytes"] += len(base64.b64decode(event["audio"]))
+                if received["audio_bytes"] >= expected_bytes:
+                    input_done.set()
+
+    browser_received = 0
+    output_done = asyncio.Event()
+
+    async def send_output_chunk(chunk: str) -> None:
+        nonlocal browser_received
+        browser_received += 1
+        if browser_received >= deltas:
+            output_done.set()
+
+    async def mic():
+        frame = json.dumps({"type": "input_audio_buffer.append", "audio": MIC_FRAME}, separators=(",", ":"))
+        for _ in range(frames):
+            yield frame
+            await asyncio.sleep(0)
+        await asyncio.Event().wait()
+
+    async with websockets.serve(fake_realtime, "127.0.0.1", 0, max_size=None) as server:
+        port = server.sockets[0].getsockname()[1]
+        agent = OpenAIVoiceReactAgent(
+            model="fake-realtime",
+            openai_api_key="test",
+            url=f"ws://127.0.0.1:{port}",
+            tools=[],
+            audio_relay=relay,
+        )
+        start = time.perf_counter()
+        task = asyncio.create_task(agent.aconnect(mic(), send_output_chunk))
+        await asyncio.wait_for(asyncio.gather(input_done.wait(), output_done.wait()), timeout=120)
+        elapsed = time.perf_counter() - start
+        task.cancel()
+        try:
+            await task
+        except asyncio.CancelledError:
+            pass
+
+    print(
+        f"{name:>8}: {elapsed:6.2f}s | mic {frames / elapsed:8.0f} frames/s -> "
+        f"{received['messages']:5d} upstream msgs | speaker {deltas / elapsed:7.0f} msgs/s | "
+        f"{elapsed / (frames + deltas) * 1e6:6.1f} us/frame"
+    )
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--frames", type=int, default=5000)
+    parser.add_argument("--deltas", type=int, default=2000)
+    args = parser.parse_args()
+
+    legacy = AudioRelayConfig(coalesce_input=False, passthrough=False, outbound_queue_size=args.deltas)
+    relay = AudioRelayConfig(outbound_queue_size=args.deltas)
+    await run_case("legacy", legacy, args.frames, args.deltas)
+    await run_case("relay", relay, args.frames, args.deltas)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,63 @@
+import asyncio
+
+from langchain_openai_voice.relay import OutboundRelay
+
+
+def _relay(sent: list, gate: asyncio.Event, maxsize: int) -> OutboundRelay:
+    async def send(message: str) -> None:
+        await gate.wait()
+        sent.append(message)
+
+    return OutboundRelay(send, maxsize)
+
+
+async def _drain(sent: list, count: int) -> None:
+    while len(sent) < count:
+        await asyncio.sleep(0.01)
+
+
+def test_full_queue_drops_only_audio():
+    sent: list[str] = []
+
+    async def run():
+        gate = asyncio.Event()
+        relay = _relay(sent, gate, maxsize=2)
+        async with relay:
+            relay.put_audio("a1")
+            relay.put("done")
+            relay.put_audio("a2")
+            relay.put_audio("a3")
+            gate.set()
+            await asyncio.wait_for(_drain(sent, 3), timeout=1)
+        return relay.dropped
+
+    dropped = asyncio.run(run())
+
+    assert sent == ["done", "a2", "a3"]
+    assert dropped == 1
+
+
+def test_interrupt_clears_audio_and_is_sent_first():
+    sent: list[str] = []
+
+    async def run():
+        gate = asyncio.Event()
+        relay = _relay(sent, gate, maxsize=2)
+        async with relay:
+            relay.put_audio("a1")
+            relay.put_audio("a2")
+            relay.put_audio("a3")
+            relay.put("done")
+            relay.interrupt("speech_started")
+            relay.put_audio("b1")
+            gate.set()
+            await asyncio.wait_for(_drain(sent, 3), timeout=1)
+            await asyncio.sleep(0.05)
+        return relay.dropped
+
+    dropped = asyncio.run(run())
+
+    # a1 may already be in flight when the interrupt arrives
+    assert sent[-3:] == ["speech_started", "done", "b1"]
+    assert "a2" not in sent and "a3" not in sent
+    assert dropped >= 2
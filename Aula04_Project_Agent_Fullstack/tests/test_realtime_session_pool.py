@@ -0,0 +1,71 @@
+import asyncio
+import time
+from contextlib import AsyncExitStack
+
+from langchain_openai_voice import RealtimeSession, RealtimeSessionPool
+
+CONNECT_LATENCY = 0.2
+
+
+def _session_factory(opened: list, closed: list):
+    async def open_session() -> RealtimeSession:
+        await asyncio.sleep(CONNECT_LATENCY)
+        stack = AsyncExitStack()
+        session = RealtimeSession(send=None, stream=None, exit_stack=stack)
+        stack.callback(closed.append, session)
+        opened.append(session)
+        return session
+
+    return open_session
+
+
+def test_acquire_hands_out_warm_sessions_and_replenishes():
+    opened, closed = [], []
+
+    async def run():
+        pool = RealtimeSessionPool(_session_factory(opened, closed), size=2)
+        await pool.start()
+        await asyncio.sleep(CONNECT_LATENCY * 2 + 0.1)
+
+        start = time.perf_counter()
+        session = await pool.acquire()
+        warm_latency = time.perf_counter() - start
+
+        await asyncio.sleep(CONNECT_LATENCY + 0.1)
+        stats = pool.stats()
+        await session.aclose()
+        await pool.close()
+        return warm_latency, stats
+
+    warm_latency, stats = asyncio.run(run())
+
+    assert warm_latency < CONNECT_LATENCY / 4
+    assert stats["warm_hits"] == 1
+    assert stats["cold_starts"] == 0
+    # the handed out session was replaced in the background
+    assert stats["idle"] == 2
+    assert len(opened) == 3
+    assert len(closed) == 3
+
+
+def test_stale_sessions_are_discarded_and_cold_start_used_when_empty():
+    opened, closed = [], []
+
+    async def run():
+        pool = RealtimeSessionPool(
+            _session_factory(opened, closed), size=1, max_idle_seconds=0.05
+        )
+        # not started: nothing warm, acquire opens a session directly
+        session = await pool.acquire()
+        await session.aclose()
+
+        await pool.start()
+        await asyncio.sleep(CONNECT_LATENCY + 0.1)
+        stats = pool.stats()
+        await pool.close()
+        return stats
+
+    stats = asyncio.run(run())
+
+    assert stats["cold_starts"] == 1
+    assert stats["discarded"] >= 1
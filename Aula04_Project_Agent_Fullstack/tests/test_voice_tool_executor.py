@@ -0,0 +1,152 @@
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+
+from langchain_core.tools import tool
+
+import langchain_openai_voice
+from langchain_openai_voice import OpenAIVoiceReactAgent, VoiceToolExecutor
+
+
+@tool
+async def slow_lookup(name: str) -> str:
+    """Look up a name slowly."""
+    await asyncio.sleep(0.4)
+    return f"slow:{name}"
+
+
+@tool
+async def fast_lookup(name: str) -> str:
+    """Look up a name quickly."""
+    await asyncio.sleep(0.2)
+    return f"fast:{name}"
+
+
+def _tool_call(tool_name: str, call_id: str, **args) -> dict:
+    return {
+        "type": "response.function_call_arguments.done",
+        "name": tool_name,
+        "call_id": call_id,
+        "arguments": json.dumps(args),
+    }
+
+
+def test_parallel_tool_calls_complete_in_completion_order():
+    async def run():
+        executor = VoiceToolExecutor(
+            tools_by_name={t.name: t for t in (slow_lookup, fast_lookup)}
+        )
+        outputs = executor.output_iterator()
+
+        start = time.perf_counter()
+        await executor.add_tool_call(_tool_call("slow_lookup", "a", name="x"))
+        await executor.add_tool_call(_tool_call("fast_lookup", "b", name="y"))
+        await executor.add_tool_call(_tool_call("missing", "c"))
+
+        results = [await anext(outputs) for _ in range(3)]
+        elapsed = time.perf_counter() - start
+        await outputs.aclose()
+        return results, elapsed, executor.pending
+
+    results, elapsed, pending = asyncio.run(run())
+
+    call_ids = [r["item"]["call_id"] for r in results]
+    assert call_ids == ["c", "b", "a"]
+    assert results[0]["item"]["output"].startswith("Error: tool missing not found")
+    assert json.loads(results[2]["item"]["output"]) == "slow:x"
+    # both tools ran concurrently: sequential execution would take 0.6s
+    assert elapsed < 0.55
+    assert pending == 0
+
+
+def test_concurrency_cap_limits_running_tools():
+    running = 0
+    peak = 0
+
+    @tool
+    async def tracked(n: int) -> int:
+        """Tracks how many calls run at once."""
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.05)
+        running -= 1
+        return n
+
+    async def run():
+        executor = VoiceToolExecutor(
+            tools_by_name={"tracked": tracked}, max_concurrency=2
+        )
+        outputs = executor.output_iterator()
+        for i in range(6):
+            await executor.add_tool_call(_tool_call("tracked", str(i), n=i))
+        results = [await anext(outputs) for _ in range(6)]
+        await outputs.aclose()
+        return results
+
+    results = asyncio.run(run())
+
+    assert sorted(r["item"]["call_id"] for r in results) == [str(i) for i in range(6)]
+    assert peak == 2
+
+
+def test_agent_answers_parallel_calls_from_fake_realtime_stream(monkeypatch):
+    sent: list[dict] = []
+
+    @asynccontextmanager
+    async def fake_connect(*, api_key, model, url, raw=False):
+        all_answered = asyncio.Event()
+
+        async def send_event(event):
+            event = json.loads(event) if isinstance(event, str) else event
+            sent.append(event)
+            if event["type"] == "response.create":
+                all_answered.set()
+
+        async def event_stream():
+            events = [
+                {"type": "session.created"},
+                # the realtime model issues two function calls in one response
+                _tool_call("slow_lookup", "call_1", name="beach house"),
+                _tool_call("fast_lookup", "call_2", name="cabin"),
+                {"type": "response.done"},
+            ]
+            for event in events:
+                yield json.dumps(event) if raw else event
+            await all_answered.wait()
+
+        yield send_event, event_stream()
+
+    async def mic():
+        await asyncio.Event().wait()
+        yield ""
+
+    monkeypatch.setattr(langchain_openai_voice, "connect", fake_connect)
+    agent = OpenAIVoiceReactAgent(
+        model="fake-realtime",
+        openai_api_key="test",
+        tools=[slow_lookup, fast_lookup],
+    )
+
+    async def run():
+        async def send_output_chunk(chunk: str) -> None:
+            pass
+
+        task = asyncio.create_task(agent.aconnect(mic(), send_output_chunk))
+        for _ in range(100):
+            if any(e["type"] == "response.create" for e in sent):
+                break
+            await asyncio.sleep(0.01)
+        task.cancel()
+
+    asyncio.run(run())
+
+    outputs = [e for e in sent if e["type"] == "conversation.item.create"]
+    assert [o["item"]["call_id"] for o in outputs] == ["call_2", "call_1"]
+    # a single response is requested, after both outputs were sent
+    assert [e["type"] for e in sent][-3:] == [
+        "conversation.item.create",
+        "conversation.item.create",
+        "response.create",
+    ]
@@ -3,20 +3,29 @@ from quart import Quart, request, jsonify, Response
 from datetime import datetime
 from functools import wraps
 import os
-import json
 from hypercorn.config import Config
 from hypercorn.asyncio import serve
 import asyncio
 
 from src.graph.core import run_turn, run_turn_streamed
 from src.graph.tools import RAG_TOOL, CLOSE_CHAT_TOOL
-from src.utils.common import common_logger, read_json_from_file
+from src.graph.swarm_wrapper import tool_latency, workflow_cache_key
+from src.graph.telemetry import turn_metrics
+from src.graph.webhook_client import webhook_pool
+from src.graph.project_secrets import project_secrets
+from src.graph.mcp_pool import mcp_pool
+from src.graph.mock_cache import mock_response_cache
+from src.graph.tool_calling import project_sources, embedding_cache, document_cache, result_cache
+from src.utils.common import common_logger, event_logger as event_log, read_json_from_file
+from src.utils.serialization import format_sse, loads as json_loads
+from src.app.session_store import CONVERSATION_FIELDS, SessionConflict, create_session_store
 
 from pprint import pprint
 
 logger = common_logger
 app = Quart(__name__)
 config = read_json_from_file("./configs/default_config.json")
+session_store = create_session_store()
 
 # filter out agent transfer messages using a function
 def is_agent_transfer_message(msg):
@@ -33,6 +42,84 @@ def is_agent_transfer_message(msg):
         return True
     return False
 
+def preprocess_messages(messages):
+    """Drops agent transfer messages and fixes null content / roles, on copies of the messages."""
+    input_messages = []
+    for msg in messages:
+        # filter out agent transfer messages
+        if is_agent_transfer_message(msg):
+            continue
+        msg = dict(msg)
+
+        # Preprocess messages to handle null content and role issues
+        if (msg.get("role") == "assistant" and
+            msg.get("content") is None and
+            msg.get("tool_calls") is not None and
+            len(msg.get("tool_calls")) > 0):
+            msg["content"] = "Calling tool"
+
+        if msg.get("role") == "tool":
+            msg["role"] = "developer"
+        elif not msg.get("role"):
+            msg["role"] = "user"
+        input_messages.append(msg)
+    return input_messages
+
+def new_session_messages(request_data):
+    """New messages sent in session mode: "messages" (a list) or "message" (a dict or plain user text)."""
+    message = request_data.get("message")
+    if isinstance(message, str):
+        return [{"role": "user", "content": message}]
+    if isinstance(message, dict):
+        return [message]
+    return list(request_data.get("messages", []))
+
+async def load_turn(request_data):
+    """
+    Returns (turn request, session). Without a sessionId the request is used
+    as is and session is None. A sessionId request carrying "agents" starts
+    (or resets) the session from the full request; otherwise the stored
+    session is loaded and only the new messages are appended. Session is
+    None with a sessionId if it is unknown.
+    """
+    session_id = request_data.get("sessionId")
+    if not session_id:
+        return request_data, None
+
+    if "agents" in request_data:
+        workflow = {k: v for k, v in request_data.items() if k not in CONVERSATION_FIELDS}
+        session = {
+            "workflow": workflow,
+            "workflowKey": workflow_cache_key(workflow.get("agents", []), workflow.get("tools", []), workflow),
+            "messages": new_session_messages(request_data),
+            "state": request_data.get("state", {})
+        }
+    else:
+        stored = await session_store.get(session_id)
+        if stored is None:
+            return None, None
+        # Copy so a failed turn leaves the stored session untouched
+        session = {**stored, "messages": stored["messages"] + new_session_messages(request_data)}
+
+    turn_request = {**session["workflow"], "messages": session["messages"], "state": session["state"]}
+    return turn_request, session
+
+async def save_turn(session_id, session, output_messages, final_state):
+    session["messages"] = session["messages"] + output_messages
+    session["state"] = final_state
+    await session_store.save(session_id, session)
+
+@app.before_serving
+async def start_tool_pools():
+    await mcp_pool.start()
+    await project_sources.start()
+
+@app.after_serving
+async def close_tool_pools():
+    await webhook_pool.close()
+    await mcp_pool.close()
+    await project_sources.close()
+
 @app.route("/health", methods=["GET"])
 async def health():
     return jsonify({"status": "ok"})
@@ -56,6 +143,41 @@ def require_api_key(f):
         return await f(*args, **kwargs)
     return decorated
 
+@app.route("/metrics/tools", methods=["GET"])
+@require_api_key
+async def tool_metrics():
+    return jsonify({
+        "latency": tool_latency.snapshot(),
+        "webhooks": webhook_pool.stats(),
+        "project_secrets": project_secrets.stats(),
+        "mcp_servers": mcp_pool.stats(),
+        "mock_responses": mock_response_cache.stats(),
+        "sessions": session_store.stats(),
+        "rag": {
+            "sources": project_sources.stats(),
+            "embeddings": embedding_cache.stats(),
+            "documents": document_cache.stats(),
+            "results": result_cache.stats()
+        }
+    })
+
+@app.route("/metrics", methods=["GET"])
+@require_api_key
+async def prometheus_metrics():
+    return Response(turn_metrics.render(tool_latency), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.route("/projects/<project_id>/secret/invalidate", methods=["POST"])
+@require_api_key
+async def invalidate_project_secret(project_id):
+    project_secrets.invalidate(project_id)
+    return jsonify({"status": "ok"})
+
+@app.route("/sessions/<session_id>", methods=["DELETE"])
+@require_api_key
+async def delete_session(session_id):
+    await session_store.delete(session_id)
+    return jsonify({"status": "ok"})
+
 @app.route("/chat", methods=["POST"])
 @require_api_key
 async def chat():
@@ -63,49 +185,48 @@ async def chat():
     logger.info(f"{'*'*100}Running server mode{'*'*100}")
     try:
         request_data = await request.get_json()
-        print("Request:", json.dumps(request_data))
+        event_log.payload("Request", request_data)
 
-        # filter out agent transfer messages
-        input_messages = [msg for msg in request_data["messages"] if not is_agent_transfer_message(msg)]
+        session_id = request_data.get("sessionId")
+        async with session_store.lock(session_id):
+            data, session = await load_turn(request_data)
+            if data is None:
+                return jsonify({"error": f"Unknown session {session_id}"}), 404
 
-        # Preprocess messages to handle null content and role issues
-        for msg in input_messages:
-            if (msg.get("role") == "assistant" and
-                msg.get("content") is None and
-                msg.get("tool_calls") is not None and
-                len(msg.get("tool_calls")) > 0):
-                msg["content"] = "Calling tool"
-
-            if msg.get("role") == "tool":
-                msg["role"] = "developer"
-            elif not msg.get("role"):
-                msg["role"] = "user"
-
-        data = request_data
-        messages = []
-        final_state = {}
-        # tokens_used = 0
-
-        async for event_type, event_data in run_turn_streamed(
-            messages=input_messages,
-            start_agent_name=data.get("startAgent", ""),
-            agent_configs=data.get("agents", []),
-            tool_configs=data.get("tools", []),
-            start_turn_with_start_agent=config.get("start_turn_with_start_agent", False),
-            state=data.get("state", {}),
-            additional_tool_configs=[RAG_TOOL, CLOSE_CHAT_TOOL],
-            complete_request=data
-        ):
-            if event_type == 'message':
-                messages.append(event_data)
-            elif event_type == 'done':
-                final_state = event_data['state']
-                # tokens_used = event_data["tokens_used"]
+            input_messages = preprocess_messages(data["messages"])
+            messages = []
+            final_state = {}
+            telemetry = None
+            # tokens_used = 0
+
+            async for event_type, event_data in run_turn_streamed(
+                messages=input_messages,
+                start_agent_name=data.get("startAgent", ""),
+                agent_configs=data.get("agents", []),
+                tool_configs=data.get("tools", []),
+                start_turn_with_start_agent=config.get("start_turn_with_start_agent", False),
+                state=data.get("state", {}),
+                additional_tool_configs=[RAG_TOOL, CLOSE_CHAT_TOOL],
+                complete_request=data,
+                workflow_key=session["workflowKey"] if session else None
+            ):
+                if event_type == 'message':
+                    messages.append(event_data)
+                elif event_type == 'done':
+                    final_state = event_data['state']
+                    telemetry = event_data.get('telemetry')
+                    # tokens_used = event_data["tokens_used"]
+
+            if session is not None:
+                await save_turn(session_id, session, messages, final_state)
 
         out = {
             "messages": messages,
             "state": final_state,
+            "telemetry": telemetry,
         }
+        if session_id:
+            out["sessionId"] = session_id
 
         logger.info("Output:")
         for k, v in out.items():
@@ -114,61 +235,63 @@ async def chat():
 
         return jsonify(out)
 
+    except SessionConflict as e:
+        logger.warning(str(e))
+        return jsonify({"error": str(e)}), 409
     except Exception as e:
         print(traceback.format_exc())
         logger.error(f"Error: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
-def format_sse(data: dict, event: str = None) -> str:
-    msg = f"data: {json.dumps(data)}\n\n"
-    if event is not None:
-        msg = f"event: {event}\n{msg}"
-    return msg
-
 @app.route("/chat_stream", methods=["POST"])
 @require_api_key
 async def chat_stream():
     # get the request data from the request
     request_data = await request.get_data()
 
-    print("Request:", request_data.decode('utf-8'))
-    request_data = json.loads(request_data)
-
-    # filter out agent transfer messages
-    input_messages = [msg for msg in request_data["messages"] if not is_agent_transfer_message(msg)]
-
-    # Preprocess messages to handle null content and role issues
-    for msg in input_messages:
-        if (msg.get("role") == "assistant" and
-            msg.get("content") is None and
-            msg.get("tool_calls") is not None and
-            len(msg.get("tool_calls")) > 0):
-            msg["content"] = "Calling tool"
+    request_data = json_loads(request_data)
+    event_log.payload("Request", request_data)
 
-        if msg.get("role") == "tool":
-            msg["role"] = "developer"
-        elif not msg.get("role"):
-            msg["role"] = "user"
+    session_id = request_data.get("sessionId")
+    if session_id:
+        # Fail fast on unknown sessions; the turn itself is loaded under the session lock
+        if "agents" not in request_data and await session_store.get(session_id) is None:
+            return jsonify({"error": f"Unknown session {session_id}"}), 404
 
     async def generate():
         try:
-            async for event_type, event_data in run_turn_streamed(
-                messages=input_messages,
-                start_agent_name=request_data.get("startAgent", ""),
-                agent_configs=request_data.get("agents", []),
-                tool_configs=request_data.get("tools", []),
-                start_turn_with_start_agent=config.get("start_turn_with_start_agent", False),
-                state=request_data.get("state", {}),
-                additional_tool_configs=[RAG_TOOL, CLOSE_CHAT_TOOL],
-                complete_request=request_data
-            ):
-                if event_type == 'message':
-                    print("Yielding message:")
-                    yield format_sse(event_data, "message")
-                elif event_type == 'done':
-                    print("Yielding done:")
-                    yield format_sse(event_data, "done")
+            async with session_store.lock(session_id):
+                data, session = await load_turn(request_data)
+                if data is None:
+                    yield format_sse({"error": f"Unknown session {session_id}"}, "error")
+                    return
+
+                output_messages = []
+                async for event_type, event_data in run_turn_streamed(
+                    messages=preprocess_messages(data["messages"]),
+                    start_agent_name=data.get("startAgent", ""),
+                    agent_configs=data.get("agents", []),
+                    tool_configs=data.get("tools", []),
+                    start_turn_with_start_agent=config.get("start_turn_with_start_agent", False),
+                    state=data.get("state", {}),
+                    additional_tool_configs=[RAG_TOOL, CLOSE_CHAT_TOOL],
+                    complete_request=data,
+                    workflow_key=session["workflowKey"] if session else None
+                ):
+                    if event_type == 'message':
+                        if session is not None:
+                            output_messages.append(event_data)
+                        yield format_sse(event_data, "message")
+                    elif event_type == 'done':
+                        if session is not None:
+                            await save_turn(session_id, session, output_messages, event_data['state'])
+                            event_data = {**event_data, "sessionId": session_id}
+                        event_log.debug("Yielding done")
+                        yield format_sse(event_data, "done")
 
+        except SessionConflict as e:
+            logger.warning(str(e))
+            yield format_sse({"error": str(e), "status": 409}, "error")
         except Exception as e:
             logger.error(f"Streaming error: {str(e)}")
             yield format_sse({"error": str(e)}, "error")
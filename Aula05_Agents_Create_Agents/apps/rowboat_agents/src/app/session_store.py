@@ -0,0 +1,199 @@
+import asyncio
+import contextlib
+import os
+import time
+import uuid
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta, timezone
+
+from src.utils.cache import TTLCache
+from src.utils.common import common_logger as logger
+
+# Request fields that carry conversation data; everything else describes the workflow
+CONVERSATION_FIELDS = ("messages", "message", "state", "sessionId")
+
+
+class SessionConflict(Exception):
+    """Raised by SessionStore.save when another request saved the session since it was loaded."""
+
+    def __init__(self, session_id):
+        super().__init__(f"Session {session_id} was updated by another request")
+        self.session_id = session_id
+
+
+class SessionBackend(ABC):
+    """
+    Where sessions live beyond the in-process cache. shared backends are
+    seen by every worker, so their cached copies are checked against
+    version() before use. save() with an expected_version only writes if
+    the stored session still has that version and returns whether it did.
+    """
+
+    shared = False
+
+    @abstractmethod
+    async def load(self, session_id):
+        ...
+
+    @abstractmethod
+    async def save(self, session_id, session, expected_version=None):
+        ...
+
+    @abstractmethod
+    async def delete(self, session_id):
+        ...
+
+    async def version(self, session_id):
+        session = await self.load(session_id)
+        return session.get("version") if session else None
+
+
+class LocalSessionBackend(SessionBackend):
+    """Process-local stand-in for a shared store; sessions expire after ttl_seconds."""
+
+    def __init__(self, max_sessions=10000, ttl_seconds=24 * 3600):
+        self._sessions = TTLCache(max_size=max_sessions, ttl_seconds=ttl_seconds)
+
+    async def load(self, session_id):
+        return self._sessions.get(session_id)
+
+    async def save(self, session_id, session, expected_version=None):
+        if expected_version is not None and await self.version(session_id) != expected_version:
+            return False
+        self._sessions.set(session_id, session)
+        return True
+
+    async def delete(self, session_id):
+        self._sessions.pop(session_id)
+
+
+class MongoSessionBackend(SessionBackend):
+    """
+    Sessions stored in a MongoDB collection (one document per session),
+    ignored once older than ttl_seconds. Shared by all workers; saves are
+    conditional on the document's version.
+    """
+
+    shared = True
+
+    def __init__(self, collection, ttl_seconds=24 * 3600):
+        self.collection = collection
+        self.ttl_seconds = ttl_seconds
+
+    def _live(self, session_id):
+        oldest = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+        return {"_id": session_id, "updatedAt": {"$gte": oldest}}
+
+    async def load(self, session_id):
+        doc = await self.collection.find_one(self._live(session_id))
+        return doc.get("session") if doc else None
+
+    async def version(self, session_id):
+        doc = await self.collection.find_one(self._live(session_id), {"version": 1})
+        return doc.get("version") if doc else None
+
+    async def save(self, session_id, session, expected_version=None):
+        doc = {"_id": session_id, "session": session, "version": session["version"], "updatedAt": datetime.now(timezone.utc)}
+        if expected_version is None:
+            await self.collection.replace_one({"_id": session_id}, doc, upsert=True)
+            return True
+        result = await self.collection.replace_one({"_id": session_id, "version": expected_version}, doc)
+        return result.matched_count == 1
+
+    async def delete(self, session_id):
+        await self.collection.delete_one({"_id": session_id})
+
+
+class SessionStore:
+    """
+    Server-side conversation state, so clients in session mode only send the
+    new message each turn.
+
+    A session is {"workflow": request fields other than the conversation,
+    "workflowKey": compiled workflow cache key, "messages": full history,
+    "state": state from the last done event, "version": token replaced on
+    every save, "savedAt": epoch seconds}.
+    Recently used sessions are kept in an in-process cache in front of the
+    backend, for at most ttl_seconds since they were last saved, like the
+    backend itself. With a shared backend a cached copy is only used while
+    its version matches the backend's, and save() raises SessionConflict
+    if another worker saved the session in the meantime, since lock() only
+    serializes turns within this process.
+    """
+
+    def __init__(self, backend, cache_size=1024, ttl_seconds=24 * 3600):
+        self.backend = backend
+        self._cache = TTLCache(max_size=cache_size, ttl_seconds=ttl_seconds)
+        # session_id -> [lock, number of turns holding or waiting for it]
+        self._locks = {}
+
+    def lock(self, session_id):
+        """Serializes turns of one session within this process (no-op without a session id)."""
+        if not session_id:
+            return contextlib.nullcontext()
+        return self._session_lock(session_id)
+
+    @contextlib.asynccontextmanager
+    async def _session_lock(self, session_id):
+        # Entries live exactly as long as some turn uses them, so a held lock is never dropped
+        entry = self._locks.get(session_id)
+        if entry is None:
+            entry = self._locks[session_id] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        try:
+            async with entry[0]:
+                yield
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0:
+                del self._locks[session_id]
+
+    async def get(self, session_id):
+        session = self._cache.get(session_id)
+        if session is not None and self.backend.shared:
+            if await self.backend.version(session_id) != session.get("version"):
+                self._cache.pop(session_id)
+                session = None
+        if session is None:
+            session = await self.backend.load(session_id)
+            if session is not None:
+                # Cache only for what is left of the TTL since the session was last saved
+                remaining = self._cache.ttl_seconds - (time.time() - session.get("savedAt", 0))
+                if remaining <= 0:
+                    return None
+                self._cache.set(session_id, session, ttl_seconds=remaining)
+        return session
+
+    async def save(self, session_id, session):
+        """
+        Saves the session, on top of the version it was loaded with (new
+        sessions have none and replace whatever was stored).
+        """
+        expected_version = session.get("version")
+        session["version"] = uuid.uuid4().hex
+        session["savedAt"] = time.time()
+        if not await self.backend.save(session_id, session, expected_version):
+            self._cache.pop(session_id)
+            raise SessionConflict(session_id)
+        self._cache.set(session_id, session)
+
+    async def delete(self, session_id):
+        self._cache.pop(session_id)
+        await self.backend.delete(session_id)
+
+    def stats(self):
+        return {"backend": type(self.backend).__name__, "locked": len(self._locks), **self._cache.stats()}
+
+
+def create_session_store():
+    backend_name = os.environ.get("SESSION_BACKEND", "local").strip().lower()
+    ttl_seconds = float(os.environ.get("SESSION_TTL", str(24 * 3600)))
+    if backend_name == "mongo":
+        from motor.motor_asyncio import AsyncIOMotorClient
+        mongo_uri = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/rowboat").strip()
+        backend = MongoSessionBackend(AsyncIOMotorClient(mongo_uri)["rowboat"]["agent_sessions"], ttl_seconds=ttl_seconds)
+    else:
+        if backend_name != "local":
+            logger.warning(f"Unknown SESSION_BACKEND {backend_name}, using local")
+        backend = LocalSessionBackend(ttl_seconds=ttl_seconds)
+    return SessionStore(backend, cache_size=int(os.environ.get("SESSION_CACHE_SIZE", "1024")), ttl_seconds=ttl_seconds)
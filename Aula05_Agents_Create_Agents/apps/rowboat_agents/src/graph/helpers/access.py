@@ -46,3 +46,58 @@ def get_tool_config_by_name(tool_configs, tool_name):
 
 def get_tool_config_by_type(tool_configs, tool_type):
     return next((tc for tc in tool_configs if tc.get("type", "") == tool_type), None)
+
+
+class WorkflowIndex:
+    """
+    Dict-backed lookups over a workflow's agent configs, tool configs,
+    compiled agents and per-agent state data.
+
+    Built once per request so graph setup does not rescan the config lists
+    for every agent and tool. Like the next(...) helpers above, the first
+    entry wins when names repeat.
+    """
+
+    def __init__(self, agent_configs, tool_configs, agent_data=None):
+        self.agent_configs = agent_configs
+        self.tool_configs = tool_configs
+        self.agent_config_by_name = {}
+        for ac in agent_configs:
+            self.agent_config_by_name.setdefault(ac.get("name"), ac)
+        self.tool_config_by_name = {}
+        self.tool_config_by_type = {}
+        for tc in tool_configs:
+            self.tool_config_by_name.setdefault(tc.get("name", ""), tc)
+            self.tool_config_by_type.setdefault(tc.get("type", ""), tc)
+        self.agent_data_by_name = {}
+        for data in agent_data or []:
+            self.agent_data_by_name.setdefault(data.get("name", ""), data)
+        self.agent_by_name = {}
+
+    def add_agents(self, agents):
+        for agent in agents:
+            self.agent_by_name.setdefault(getattr(agent, "name", None), agent)
+        return self
+
+    def get_agent(self, agent_name):
+        agent = self.agent_by_name.get(agent_name)
+        if not agent:
+            logger.error(f"Agent with name {agent_name} not found")
+            raise ValueError(f"Agent with name {agent_name} not found")
+        return agent
+
+    def get_agent_config(self, agent_name):
+        agent_config = self.agent_config_by_name.get(agent_name)
+        if not agent_config:
+            logger.error(f"Agent config with name {agent_name} not found")
+            raise ValueError(f"Agent config with name {agent_name} not found")
+        return agent_config
+
+    def get_agent_data(self, agent_name):
+        return self.agent_data_by_name.get(agent_name)
+
+    def get_tool_config(self, tool_name):
+        return self.tool_config_by_name.get(tool_name)
+
+    def get_tool_config_by_type(self, tool_type):
+        return self.tool_config_by_type.get(tool_type)
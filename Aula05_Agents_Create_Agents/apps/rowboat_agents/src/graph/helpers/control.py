@@ -1,12 +1,14 @@
-from .access import get_agent_config_by_name, get_agent_data_by_name
+from .access import WorkflowIndex
 from src.graph.types import ControlType
 from src.utils.common import common_logger
 logger = common_logger
 
-def get_last_agent_name(state, agent_configs, start_agent_name, msg_type, latest_assistant_msg, start_turn_with_start_agent):
+def get_last_agent_name(state, agent_configs, start_agent_name, msg_type, latest_assistant_msg, start_turn_with_start_agent, index=None):
+    if index is None:
+        index = WorkflowIndex(agent_configs, [], state.get("agent_data", []))
     default_last_agent_name = state.get("last_agent_name", '')
-    last_agent_config = get_agent_config_by_name(default_last_agent_name, agent_configs)
-    specific_agent_data = get_agent_data_by_name(default_last_agent_name, state.get("agent_data", []))
+    last_agent_config = index.get_agent_config(default_last_agent_name)
+    specific_agent_data = index.get_agent_data(default_last_agent_name)
     
     # Overrides for special cases
     logger.info("Setting agent control based on last agent and control type")
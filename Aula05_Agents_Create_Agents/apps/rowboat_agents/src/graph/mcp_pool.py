@@ -0,0 +1,183 @@
+import asyncio
+import os
+import time
+
+from mcp import ClientSession
+from mcp.client.sse import sse_client
+from mcp.shared.exceptions import McpError
+
+from src.utils.cache import MISSING, TTLCache
+from src.utils.common import common_logger as logger
+
+
+class MCPServerConnection:
+    """
+    One long-lived, initialized MCP session to a server.
+
+    sse_client/ClientSession are anyio context managers that must be entered
+    and exited by the same task, so a background task owns them and keeps
+    them open until close(); callers only share the ClientSession.
+    """
+
+    def __init__(self, url, max_concurrency=8):
+        self.url = url
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.last_used = time.monotonic()
+        self.reconnects = 0
+        self._session = None
+        self._task = None
+        self._closing = None
+        self._lock = asyncio.Lock()
+
+    @property
+    def connected(self):
+        return self._session is not None and self._task is not None and not self._task.done()
+
+    async def _run(self, ready):
+        try:
+            async with sse_client(url=self.url) as streams:
+                async with ClientSession(*streams) as session:
+                    await session.initialize()
+                    self._session = session
+                    ready.set_result(session)
+                    await self._closing.wait()
+        except Exception as e:
+            if not ready.done():
+                ready.set_exception(e)
+            else:
+                logger.warning(f"MCP connection to {self.url} dropped: {e!r}")
+        finally:
+            self._session = None
+
+    async def session(self):
+        self.last_used = time.monotonic()
+        if self.connected:
+            return self._session
+        async with self._lock:
+            if self.connected:
+                return self._session
+            if self._closing is not None:
+                self.reconnects += 1
+            ready = asyncio.get_running_loop().create_future()
+            self._closing = asyncio.Event()
+            self._task = asyncio.create_task(self._run(ready))
+            return await ready
+
+    async def close(self):
+        task, self._task = self._task, None
+        if task is None:
+            return
+        self._closing.set()
+        try:
+            await asyncio.wait_for(task, timeout=5)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            task.cancel()
+        except Exception:
+            pass
+
+
+class MCPSessionPool:
+    """
+    Pool of MCP sessions keyed by server URL.
+
+    Each server gets one initialized session reused by every tool call, with
+    at most max_concurrency in-flight calls. A call that fails at the
+    transport level drops the session and is retried once on a fresh one
+    (MCP errors and timeouts are not retried); a background health check pings
+    connected servers and closes sessions idle for longer than idle_timeout.
+    list_tools results are cached for tools_ttl_seconds.
+    """
+
+    def __init__(self, max_concurrency=8, call_timeout=60.0, health_interval=30.0,
+                 idle_timeout=600.0, tools_ttl_seconds=300.0):
+        self.max_concurrency = max_concurrency
+        self.call_timeout = call_timeout
+        self.health_interval = health_interval
+        self.idle_timeout = idle_timeout
+        self._connections = {}
+        self._tools = TTLCache(max_size=256, ttl_seconds=tools_ttl_seconds)
+        self._health_task = None
+
+    def connection(self, url):
+        conn = self._connections.get(url)
+        if conn is None:
+            conn = self._connections[url] = MCPServerConnection(url, self.max_concurrency)
+        return conn
+
+    async def call_tool(self, url, tool_name, arguments):
+        conn = self.connection(url)
+        async with conn.semaphore:
+            for attempt in range(2):
+                try:
+                    session = await conn.session()
+                    return await asyncio.wait_for(session.call_tool(tool_name, arguments=arguments), timeout=self.call_timeout)
+                except (McpError, asyncio.TimeoutError):
+                    # The server answered with an error or is slow; the session is fine
+                    # and the tool may not be safe to run twice
+                    raise
+                except Exception as e:
+                    await conn.close()
+                    if attempt:
+                        raise
+                    logger.warning(f"MCP call {tool_name} on {url} failed ({e!r}), reconnecting")
+
+    async def list_tools(self, url):
+        tools = self._tools.get(url, MISSING)
+        if tools is MISSING:
+            conn = self.connection(url)
+            async with conn.semaphore:
+                session = await conn.session()
+                tools = (await asyncio.wait_for(session.list_tools(), timeout=self.call_timeout)).tools
+            self._tools.set(url, tools)
+        return tools
+
+    async def _health_check(self):
+        while True:
+            await asyncio.sleep(self.health_interval)
+            for url, conn in list(self._connections.items()):
+                if not conn.connected:
+                    continue
+                if time.monotonic() - conn.last_used > self.idle_timeout:
+                    await conn.close()
+                    continue
+                try:
+                    await asyncio.wait_for(conn._session.send_ping(), timeout=10)
+                except Exception as e:
+                    logger.warning(f"MCP health check for {url} failed ({e!r}), dropping session")
+                    await conn.close()
+                    self._tools.pop(url)
+
+    async def start(self):
+        if self._health_task is None:
+            self._health_task = asyncio.create_task(self._health_check())
+
+    async def close(self):
+        if self._health_task is not None:
+            self._health_task.cancel()
+            try:
+                await self._health_task
+            except asyncio.CancelledError:
+                pass
+            self._health_task = None
+        connections, self._connections = list(self._connections.values()), {}
+        for conn in connections:
+            await conn.close()
+
+    def stats(self):
+        return {
+            url: {
+                "connected": conn.connected,
+                "reconnects": conn.reconnects,
+                "idle_seconds": round(time.monotonic() - conn.last_used, 1)
+            }
+            for url, conn in self._connections.items()
+        }
+
+
+mcp_pool = MCPSessionPool(
+    max_concurrency=int(os.environ.get("MCP_MAX_CONCURRENCY_PER_SERVER", "8")),
+    call_timeout=float(os.environ.get("MCP_CALL_TIMEOUT", "60")),
+    health_interval=float(os.environ.get("MCP_HEALTH_INTERVAL", "30")),
+    idle_timeout=float(os.environ.get("MCP_IDLE_TIMEOUT", "600")),
+    tools_ttl_seconds=float(os.environ.get("MCP_TOOLS_TTL", "300")),
+)
@@ -0,0 +1,77 @@
+import asyncio
+import json
+import os
+
+from src.utils.cache import LRUCache, stable_hash
+from src.utils.common import common_logger as logger
+
+
+def normalize_args(args):
+    """Canonical form of a tool call's JSON arguments (key order and whitespace independent)."""
+    try:
+        return json.dumps(json.loads(args), sort_keys=True, separators=(',', ':'))
+    except (TypeError, ValueError):
+        return str(args).strip()
+
+
+class MockResponseCache(LRUCache):
+    """
+    Simulated tool responses keyed by (tool name, normalized args, tool
+    description, mock instructions), so replaying identical tool calls in a
+    test profile does not hit the LLM and returns the same output.
+
+    With a path, entries are appended to a JSONL file and loaded back on
+    start, which makes simulation runs reproducible across processes.
+    """
+
+    def __init__(self, max_size=4096, path=None):
+        super().__init__(max_size=max_size)
+        self.path = path
+        self._pending = {}
+        if path and os.path.exists(path):
+            self._load(path)
+
+    @staticmethod
+    def key(tool_name, args, description, mock_instructions):
+        return stable_hash([tool_name, normalize_args(args), description, mock_instructions])
+
+    async def get_or_generate(self, key, generate):
+        """Returns the cached response or awaits generate(); identical concurrent calls share one generation."""
+        response = self.get(key)
+        if response is not None:
+            return response
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(generate())
+            self._pending[key] = pending
+            pending.add_done_callback(lambda _: self._pending.pop(key, None))
+        response = await asyncio.shield(pending)
+        # Failed generations (None) are not cached
+        if response is not None and key not in self:
+            self.set(key, response)
+        return response
+
+    def _load(self, path):
+        try:
+            with open(path, 'r') as file:
+                for line in file:
+                    if line.strip():
+                        entry = json.loads(line)
+                        super().set(entry["key"], entry["response"])
+        except Exception as e:
+            logger.error(f"Could not load mock response cache from {path}: {e}")
+
+    def set(self, key, value):
+        super().set(key, value)
+        if self.path:
+            try:
+                with open(self.path, 'a') as file:
+                    file.write(json.dumps({"key": key, "response": value}) + '\n')
+            except Exception as e:
+                logger.error(f"Could not persist mock response: {e}")
+
+
+mock_response_cache = MockResponseCache(
+    max_size=int(os.environ.get("MOCK_TOOL_CACHE_SIZE", "4096")),
+    path=os.environ.get("MOCK_TOOL_CACHE_FILE") or None
+)
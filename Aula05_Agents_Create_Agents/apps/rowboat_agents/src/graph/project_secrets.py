@@ -0,0 +1,57 @@
+import os
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from src.utils.cache import AsyncLoadingCache
+from src.utils.common import common_logger as logger
+
+MONGO_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/rowboat").strip()
+
+
+class ProjectSecretCache:
+    """
+    Async, TTL-bounded cache of project webhook signing secrets.
+
+    Secrets are loaded with motor so tool calls never block the event loop,
+    concurrent misses for the same project share one Mongo query, and
+    unknown projects are cached for negative_ttl_seconds. Call invalidate()
+    when a project's secret is rotated.
+    """
+
+    def __init__(self, collection, ttl_seconds=300, negative_ttl_seconds=30, max_size=1024):
+        self.collection = collection
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self._cache = AsyncLoadingCache(
+            self._load,
+            max_size=max_size,
+            ttl_seconds=ttl_seconds,
+            ttl_for=lambda secret: self.negative_ttl_seconds if secret is None else None
+        )
+
+    async def get(self, project_id):
+        """Returns the project's signing secret ("" if it has none). Raises ValueError for unknown projects."""
+        secret = await self._cache.get_or_load(project_id)
+        if secret is None:
+            raise ValueError(f"Project {project_id} not found")
+        return secret
+
+    async def _load(self, project_id):
+        doc = await self.collection.find_one({"_id": project_id}, {"secret": 1})
+        if doc is None:
+            logger.warning(f"Project {project_id} not found while loading signing secret")
+            return None
+        return doc.get("secret", "")
+
+    def invalidate(self, project_id=None):
+        """Drops one project's secret, or every cached secret when project_id is None."""
+        self._cache.invalidate(project_id)
+
+    def stats(self):
+        return self._cache.stats()
+
+
+project_secrets = ProjectSecretCache(
+    AsyncIOMotorClient(MONGO_URI)["rowboat"]["projects"],
+    ttl_seconds=float(os.environ.get("PROJECT_SECRET_TTL", "300")),
+    negative_ttl_seconds=float(os.environ.get("PROJECT_SECRET_NEGATIVE_TTL", "30")),
+)
@@ -0,0 +1,151 @@
+import asyncio
+import hashlib
+import re
+from array import array
+from collections import OrderedDict
+
+from src.utils.cache import AsyncLoadingCache, LRUCache, TTLCache
+from src.utils.common import common_logger as logger
+
+
+def normalize_query(query):
+    return re.sub(r"\s+", " ", query).strip()
+
+
+class ProjectSourceCache:
+    """
+    Active data source ids per project, cached for ttl_seconds.
+
+    When MongoDB supports change streams (replica sets, Atlas), watch() drops
+    a project's entry as soon as one of its sources changes; otherwise the
+    TTL alone bounds staleness. invalidate() can also be called directly.
+    """
+
+    def __init__(self, collection, ttl_seconds=60, max_size=1024):
+        self.collection = collection
+        self._cache = AsyncLoadingCache(self._load, max_size=max_size, ttl_seconds=ttl_seconds)
+        self._watch_task = None
+
+    async def _load(self, project_id):
+        sources = await self.collection.find(
+            {"projectId": project_id, "active": True},
+            {"_id": 1}
+        ).to_list(length=None)
+        return frozenset(str(s["_id"]) for s in sources)
+
+    async def get(self, project_id):
+        return await self._cache.get_or_load(project_id)
+
+    def invalidate(self, project_id=None):
+        self._cache.invalidate(project_id)
+
+    async def watch(self):
+        try:
+            async with self.collection.watch(full_document="updateLookup") as stream:
+                async for change in stream:
+                    project_id = (change.get("fullDocument") or {}).get("projectId")
+                    # deletes carry no document, so drop every project
+                    self.invalidate(project_id)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.info(f"Data source change stream unavailable, relying on TTL: {e}")
+
+    async def start(self):
+        if self._watch_task is None:
+            self._watch_task = asyncio.create_task(self.watch())
+
+    async def close(self):
+        if self._watch_task is not None:
+            self._watch_task.cancel()
+            try:
+                await self._watch_task
+            except asyncio.CancelledError:
+                pass
+            self._watch_task = None
+
+    def stats(self):
+        return {**self._cache.stats(), "watching": self._watch_task is not None and not self._watch_task.done()}
+
+
+class EmbeddingCache(LRUCache):
+    """LRU of query embeddings keyed by (model, normalized query)."""
+
+    async def embed(self, model, query, embed_fn):
+        key = (model, normalize_query(query))
+        embedding = self.get(key)
+        if embedding is None:
+            embedding = await embed_fn(model=model, value=query)
+            self.set(key, embedding)
+        return embedding
+
+
+def embedding_hash(embedding):
+    return hashlib.sha256(array("d", embedding).tobytes()).hexdigest()
+
+
+class DocumentCache:
+    """
+    Hydrated source_docs content keyed by (docId, version), bounded by the
+    total size of the cached content (LRU eviction).
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._data = OrderedDict()
+
+    def get(self, doc_id, version):
+        key = (doc_id, version)
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def set(self, doc_id, version, content):
+        key = (doc_id, version)
+        size = len(content.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        old = self._data.pop(key, None)
+        if old is not None:
+            self.bytes -= old[1]
+        self._data[key] = (content, size)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            _, (_, evicted_size) = self._data.popitem(last=False)
+            self.bytes -= evicted_size
+
+    def clear(self):
+        self._data.clear()
+        self.bytes = 0
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "docs": len(self._data),
+            "bytes": self.bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class RAGResultCache(TTLCache):
+    """Formatted RAG tool results, keyed by (projectId, sources, query embedding, k, return type)."""
+
+    @staticmethod
+    def key(project_id, source_ids, embedding, k, return_type):
+        return (project_id, tuple(sorted(set(source_ids))), embedding_hash(embedding), k, return_type)
+
+    def stats(self):
+        return {
+            **super().stats(),
+            "bytes": sum(len(value.encode("utf-8")) for _, value in self._data.values())
+        }
@@ -0,0 +1,257 @@
+import uuid
+from dataclasses import dataclass
+
+from src.utils.common import event_logger as event_log
+from src.utils.serialization import dumps as json_dumps
+
+
+# Responses API stream events that never carry a raw_item: text/argument deltas
+# and lifecycle events, i.e. the bulk of a stream
+PASSTHROUGH_RAW_EVENTS = frozenset({
+    "response.in_progress",
+    "response.output_item.added",
+    "response.output_item.done",
+    "response.content_part.added",
+    "response.content_part.done",
+    "response.output_text.delta",
+    "response.output_text.done",
+    "response.output_text.annotation.added",
+    "response.refusal.delta",
+    "response.refusal.done",
+    "response.function_call_arguments.delta",
+    "response.function_call_arguments.done",
+    "response.web_search_call.in_progress",
+    "response.web_search_call.searching",
+    "response.web_search_call.completed",
+})
+
+# Deltas that count as the first token of a turn
+FIRST_TOKEN_EVENTS = frozenset({
+    "response.output_text.delta",
+    "response.refusal.delta",
+    "response.function_call_arguments.delta",
+})
+
+
+def _get(raw, name, default=None):
+    """Reads a field from an SDK raw item, which may be a pydantic model or a plain dict."""
+    if isinstance(raw, dict):
+        return raw.get(name, default)
+    return getattr(raw, name, default)
+
+
+@dataclass(slots=True)
+class ToolCallMessage:
+    sender: str | None
+    call_id: str
+    name: str
+    arguments: str
+
+    def to_dict(self):
+        return {
+            'content': None,
+            'role': 'assistant',
+            'sender': self.sender,
+            'tool_calls': [{
+                'function': {
+                    'name': self.name,
+                    'arguments': self.arguments
+                },
+                'id': self.call_id,
+                'type': 'function'
+            }],
+            'tool_call_id': None,
+            'tool_name': None,
+            'response_type': 'internal'
+        }
+
+
+@dataclass(slots=True)
+class ToolResultMessage:
+    call_id: str | None
+    tool_name: str | None
+    content: str
+    # Transfer results are sent without a response_type
+    response_type: str | None = 'internal'
+
+    def to_dict(self):
+        message = {
+            'content': self.content,
+            'role': 'tool',
+            'sender': None,
+            'tool_calls': None,
+            'tool_call_id': self.call_id,
+            'tool_name': self.tool_name,
+        }
+        if self.response_type is not None:
+            message['response_type'] = self.response_type
+        return message
+
+
+@dataclass(slots=True)
+class AssistantMessage:
+    sender: str
+    content: str
+    citations: list | None = None
+
+    def to_dict(self):
+        message = {
+            'content': self.content,
+            'role': 'assistant',
+            'sender': self.sender,
+            'tool_calls': None,
+            'tool_call_id': None,
+            'tool_name': None,
+            'response_type': 'external'
+        }
+        if self.citations:
+            message['citations'] = self.citations
+        return message
+
+
+class StreamEventTranslator:
+    """
+    Turns openai-agents stream events into rowboat messages in one pass.
+
+    Handlers are looked up once per event by event type, and run items by
+    item type; deltas and other PASSTHROUGH_RAW_EVENTS return right away,
+    and only unknown item types fall back to inspecting the raw item for
+    web search calls/results. translate() returns the messages
+    to emit (usually none, e.g. for text deltas) and keeps current_agent and
+    tokens_used up to date, as well as telemetry (a TurnTelemetry) if given.
+    """
+
+    def __init__(self, current_agent, tokens_used, telemetry=None):
+        self.current_agent = current_agent
+        self.tokens_used = tokens_used
+        self.telemetry = telemetry
+        self._awaiting_first_token = telemetry is not None
+        self._event_handlers = {
+            "raw_response_event": self._raw_response,
+            "agent_updated_stream_event": self._agent_updated,
+            "run_item_stream_event": self._run_item,
+        }
+        self._item_handlers = {
+            "tool_call_item": self._tool_call,
+            "tool_call_output_item": self._tool_output,
+            "message_output_item": self._message_output,
+            "web_search_call_item": self._web_search_call,
+            "web_search_results_item": self._web_search_results,
+        }
+
+    @property
+    def sender(self):
+        return self.current_agent.name if self.current_agent else None
+
+    def translate(self, event):
+        event_type = event.type
+        # Fast path for deltas, checked before dispatch since they are most events
+        if event_type == "raw_response_event":
+            data_type = getattr(event.data, 'type', None)
+            if data_type in PASSTHROUGH_RAW_EVENTS:
+                if self._awaiting_first_token and data_type in FIRST_TOKEN_EVENTS:
+                    self._awaiting_first_token = False
+                    self.telemetry.first_token()
+                return ()
+        handler = self._event_handlers.get(event_type)
+        return handler(event) if handler else ()
+
+    def _raw_response(self, event):
+        data = event.data
+        data_type = getattr(data, 'type', None)
+        if data_type == "response.created":
+            if self.telemetry is not None:
+                self.telemetry.llm_call_started()
+        elif data_type == "response.completed":
+            usage = getattr(data.response, 'usage', None)
+            if usage is not None:
+                self.tokens_used["total"] += usage.total_tokens
+                self.tokens_used["prompt"] += usage.input_tokens
+                self.tokens_used["completion"] += usage.output_tokens
+            if self.telemetry is not None:
+                model = getattr(data.response, 'model', None) or "unknown"
+                self.telemetry.llm_call_completed(self.sender, model, usage)
+        raw = getattr(data, 'raw_item', None)
+        if raw is not None and _get(raw, 'type') == 'web_search_call':
+            call_id = _get(raw, 'id') or str(uuid.uuid4())
+            arguments = json_dumps({'search_id': call_id, 'status': _get(raw, 'status', 'unknown')})
+            return (ToolCallMessage(self.sender, call_id, 'web_search', arguments),)
+        return ()
+
+    def _agent_updated(self, event):
+        new_agent = event.new_agent
+        if self.current_agent.name == new_agent.name:
+            return ()
+        call_id = str(uuid.uuid4())
+        arguments = json_dumps({'assistant': new_agent.name})
+        messages = (
+            ToolCallMessage(self.current_agent.name, call_id, 'transfer_to_agent', arguments),
+            ToolResultMessage(call_id, 'transfer_to_agent', arguments, response_type=None),
+        )
+        self.current_agent = new_agent
+        if self.telemetry is not None:
+            self.telemetry.handoff()
+        return messages
+
+    def _run_item(self, event):
+        item = event.item
+        self.current_agent = item.agent
+        handler = self._item_handlers.get(item.type, self._other_item)
+        return handler(item, item.raw_item)
+
+    def _tool_call(self, item, raw):
+        if _get(raw, 'type') == 'web_search_call':
+            call_id = _get(raw, 'id') or str(uuid.uuid4())
+            return (
+                ToolCallMessage(self.sender, call_id, 'web_search', json_dumps({'search_id': call_id})),
+                ToolResultMessage(call_id, 'web_search', "Web search done"),
+            )
+        return (ToolCallMessage(self.sender, raw.call_id, raw.name, raw.arguments),)
+
+    def _tool_output(self, item, raw):
+        if _get(raw, 'type') == 'web_search_results':
+            call_id = _get(raw, 'search_id') or _get(raw, 'id') or str(uuid.uuid4())
+            return (ToolResultMessage(call_id, 'web_search', str(item.output)),)
+        return (ToolResultMessage(_get(raw, 'call_id'), _get(raw, 'name'), str(item.output)),)
+
+    def _message_output(self, item, raw):
+        content = ""
+        citations = []
+        for content_item in getattr(raw, 'content', None) or ():
+            text = getattr(content_item, 'text', None)
+            if text is not None:
+                content += text
+            for annotation in getattr(content_item, 'annotations', None) or ():
+                if getattr(annotation, 'type', None) == 'url_citation':
+                    citations.append({
+                        'url': getattr(annotation, 'url', ''),
+                        'title': getattr(annotation, 'title', ''),
+                        'start_index': getattr(annotation, 'start_index', 0),
+                        'end_index': getattr(annotation, 'end_index', 0)
+                    })
+        return (AssistantMessage(self.current_agent.name, content, citations),)
+
+    def _web_search_call(self, item, raw):
+        call_id = _get(raw, 'id')
+        arguments = json_dumps({'search_id': call_id})
+        return (ToolCallMessage(self.sender, call_id or str(uuid.uuid4()), 'web_search', arguments),)
+
+    def _web_search_results(self, item, raw):
+        call_id = _get(raw, 'search_id') or _get(raw, 'id') or str(uuid.uuid4())
+        results = getattr(item, 'output', None)
+        if results is None:
+            results = _get(raw, 'results', {})
+        try:
+            content = json_dumps(results) if results else ""
+        except Exception as e:
+            event_log.error("Error serializing results: %s", e)
+            content = str(results)
+        return (ToolResultMessage(call_id, 'web_search', content),)
+
+    def _other_item(self, item, raw):
+        raw_type = _get(raw, 'type')
+        if raw_type == 'web_search_call':
+            return self._web_search_call(item, raw)
+        if raw_type == 'web_search_results':
+            return self._web_search_results(item, raw)
+        return ()
@@ -1,35 +1,102 @@
 import logging
 import json
-import aiohttp
 import jwt
 import hashlib
+from copy import deepcopy
 
 # Import helper functions needed for get_agents
-from .helpers.access import (
-    get_tool_config_by_name,
-    get_tool_config_by_type
-)
+from .helpers.access import WorkflowIndex
 from .helpers.instructions import (
     add_rag_instructions_to_agent
 )
 
 from agents import Agent as NewAgent, Runner, FunctionTool, RunContextWrapper, ModelSettings, WebSearchTool
 # Add import for OpenAI functionality
-from src.utils.common import common_logger as logger, generate_openai_output
+from src.utils.common import common_logger as logger, event_logger as event_log, generate_openai_output_async
+from src.utils.cache import LRUCache, stable_hash
+from src.utils.metrics import LatencyHistogram
 from typing import Any
-from dataclasses import asdict
+from dataclasses import asdict, dataclass, field
 import asyncio
-from mcp import ClientSession
-from mcp.client.sse import sse_client
+import time
 
 from pydantic import BaseModel
 from typing import List, Optional, Dict
 from .tool_calling import call_rag_tool
-from pymongo import MongoClient
+from .webhook_client import webhook_pool
+from .project_secrets import project_secrets
+from .mcp_pool import mcp_pool
+from .mock_cache import MockResponseCache, mock_response_cache
 import os
-MONGO_URI = os.environ.get("MONGODB_URI", "mongodb://localhost:27017/rowboat").strip()
-mongo_client = MongoClient(MONGO_URI)
-db = mongo_client["rowboat"]
+
+# Compiled agent graphs, keyed by workflow hash (see workflow_cache_key)
+WORKFLOW_CACHE_SIZE = int(os.environ.get("WORKFLOW_CACHE_SIZE", "64"))
+workflow_cache = LRUCache(max_size=WORKFLOW_CACHE_SIZE)
+
+# Tool call latency, labelled by (kind, tool_name)
+tool_latency = LatencyHistogram()
+
+# Tool calls of one turn that may run at once, and the default per-call timeout
+TOOL_MAX_CONCURRENCY = int(os.environ.get("TOOL_MAX_CONCURRENCY", "8"))
+TOOL_TIMEOUT = float(os.environ.get("TOOL_TIMEOUT", "60"))
+
+
+class ToolExecutor:
+    """
+    Runs the tool calls of one turn.
+
+    The agents SDK already starts all function calls of a model response
+    together and emits their results in call order; this adds a per-turn
+    concurrency cap, a per-call timeout and cancel() for aborted turns.
+    Finished calls are recorded in calls as (tool_name, seconds, error).
+    """
+
+    def __init__(self, max_concurrency=TOOL_MAX_CONCURRENCY, timeout=TOOL_TIMEOUT):
+        self.timeout = timeout
+        self.cancelled = False
+        self.calls = []
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._tasks = set()
+
+    async def run(self, tool_name, make_call, timeout=None):
+        if self.cancelled:
+            return f"Error: turn aborted before {tool_name} ran"
+        timeout = timeout or self.timeout
+        async with self._semaphore:
+            task = asyncio.ensure_future(make_call())
+            self._tasks.add(task)
+            start = time.perf_counter()
+            error = True
+            try:
+                result = await asyncio.wait_for(task, timeout=timeout)
+                # Tool wrappers report failures as "Error: ..." results
+                error = isinstance(result, str) and result.startswith("Error:")
+                return result
+            except asyncio.TimeoutError:
+                logger.error(f"Tool {tool_name} timed out after {timeout}s")
+                return f"Error: tool {tool_name} timed out after {timeout}s"
+            finally:
+                self._tasks.discard(task)
+                self.calls.append((tool_name, time.perf_counter() - start, error))
+
+    def cancel(self):
+        """Cancels every in-flight tool call; later calls return an error immediately."""
+        self.cancelled = True
+        for task in list(self._tasks):
+            task.cancel()
+
+
+@dataclass
+class TurnContext:
+    """Per-request state handed to the Runner as its context and read by tools at call time."""
+    request: dict
+    tools: ToolExecutor = field(default_factory=ToolExecutor)
+
+
+def get_turn_context(ctx: RunContextWrapper[Any]) -> TurnContext:
+    if isinstance(ctx.context, TurnContext):
+        return ctx.context
+    return TurnContext(request=ctx.context or {})
 
 class NewResponse(BaseModel):
     messages: List[Dict]
@@ -39,23 +106,26 @@ class NewResponse(BaseModel):
 
 async def mock_tool(tool_name: str, args: str, description: str, mock_instructions: str) -> str:
     try:
-        print(f"Mock tool called for: {tool_name}")
+        event_log.debug("Mock tool called for: %s", tool_name)
 
         messages = [
             {"role": "system", "content": f"You are simulating the execution of a tool called '{tool_name}'.Here is the description of the tool: {description}. Here are the instructions for the mock tool: {mock_instructions}. Generate a realistic response as if the tool was actually executed with the given parameters."},
             {"role": "user", "content": f"Generate a realistic response for the tool '{tool_name}' with these parameters: {args}. The response should be concise and focused on what the tool would actually return."}
         ]
 
-        print(f"Generating simulated response for tool: {tool_name}")
-        response_content = generate_openai_output(messages, output_type='text', model="gpt-4o")
+        key = MockResponseCache.key(tool_name, args, description, mock_instructions)
+        response_content = await mock_response_cache.get_or_generate(
+            key,
+            lambda: generate_openai_output_async(messages, output_type='text', model="gpt-4o")
+        )
         return response_content
     except Exception as e:
         logger.error(f"Error in mock_tool: {str(e)}")
         return f"Error: {str(e)}"
 
-async def call_webhook(tool_name: str, args: str, webhook_url: str, signing_secret: str) -> str:
+async def call_webhook(tool_name: str, args: str, webhook_url: str, signing_secret: str, idempotent: bool = False) -> str:
     try:
-        print(f"Calling webhook for tool: {tool_name}")
+        event_log.debug("Calling webhook for tool: %s", tool_name)
         content_dict = {
             "toolCall": {
                 "function": {
@@ -77,28 +147,23 @@ async def call_webhook(tool_name: str, args: str, webhook_url: str, signing_secr
             signature_jwt = jwt.encode(payload, signing_secret, algorithm="HS256")
             headers["X-Signature-Jwt"] = signature_jwt
 
-        async with aiohttp.ClientSession() as session:
-            async with session.post(webhook_url, json=request_body, headers=headers) as response:
-                if response.status == 200:
-                    response_json = await response.json()
-                    return response_json.get("result", "")
-                else:
-                    error_msg = await response.text()
-                    print(f"Webhook error: {error_msg}")
-                    return f"Error: {error_msg}"
+        # Only tools marked idempotent are retried after the request may have reached them
+        status, body = await webhook_pool.post_json(webhook_url, request_body, headers=headers, idempotent=idempotent)
+        if status == 200:
+            return json.loads(body).get("result", "")
+        else:
+            event_log.error("Webhook error for tool %s: %s", tool_name, body)
+            return f"Error: {body}"
     except Exception as e:
         logger.error(f"Exception in call_webhook: {str(e)}")
         return f"Error: Failed to call webhook - {str(e)}"
 
 async def call_mcp(tool_name: str, args: str, mcp_server_url: str) -> str:
     try:
-        print(f"MCP tool called for: {tool_name}")
-        async with sse_client(url=mcp_server_url) as streams:
-            async with ClientSession(*streams) as session:
-                await session.initialize()
-                jargs = json.loads(args)
-                response = await session.call_tool(tool_name, arguments=jargs)
-                json_output = json.dumps([item.__dict__ for item in response.content], indent=2)
+        event_log.debug("MCP tool called for: %s", tool_name)
+        jargs = json.loads(args)
+        response = await mcp_pool.call_tool(mcp_server_url, tool_name, jargs)
+        json_output = json.dumps([item.__dict__ for item in response.content], indent=2)
 
         return json_output
     except Exception as e:
@@ -107,9 +172,9 @@ async def call_mcp(tool_name: str, args: str, mcp_server_url: str) -> str:
 
 async def catch_all(ctx: RunContextWrapper[Any], args: str, tool_name: str, tool_config: dict, complete_request: dict) -> str:
     try:
-        print(f"Catch all called for tool: {tool_name}")
-        print(f"Args: {args}")
-        print(f"Tool config: {tool_config}")
+        event_log.debug("Catch all called for tool: %s", tool_name)
+        event_log.payload("Tool args", args)
+        event_log.payload("Tool config", tool_config)
 
         # Create event loop for async operations
         try:
@@ -119,30 +184,50 @@ async def catch_all(ctx: RunContextWrapper[Any], args: str, tool_name: str, tool
             asyncio.set_event_loop(loop)
 
         response_content = None
-        if tool_config.get("mockTool", False) or complete_request.get("testProfile", {}).get("mockTools", False):
-            # Call mock_tool to handle the response (it will decide whether to use mock instructions or generate a response)
-            if complete_request.get("testProfile", {}).get("mockPrompt", ""):
-                response_content = await mock_tool(tool_name, args, tool_config.get("description", ""), complete_request.get("testProfile", {}).get("mockPrompt", ""))
+        kind = tool_kind(tool_config, complete_request)
+        with tool_latency.time((kind, tool_name)):
+            if kind == "mock":
+                # Call mock_tool to handle the response (it will decide whether to use mock instructions or generate a response)
+                if complete_request.get("testProfile", {}).get("mockPrompt", ""):
+                    response_content = await mock_tool(tool_name, args, tool_config.get("description", ""), complete_request.get("testProfile", {}).get("mockPrompt", ""))
+                else:
+                    response_content = await mock_tool(tool_name, args, tool_config.get("description", ""), tool_config.get("mockInstructions", ""))
+                event_log.payload("Mock tool response", response_content)
+            elif kind == "mcp":
+                mcp_server_name = tool_config.get("mcpServerName", "")
+                mcp_servers = complete_request.get("mcpServers", {})
+                mcp_server_url = next((server.get("url", "") for server in mcp_servers if server.get("name") == mcp_server_name), "")
+                response_content = await call_mcp(tool_name, args, mcp_server_url)
             else:
-                response_content = await mock_tool(tool_name, args, tool_config.get("description", ""), tool_config.get("mockInstructions", ""))
-            print(response_content)
-        elif tool_config.get("isMcp", False):
-            mcp_server_name = tool_config.get("mcpServerName", "")
-            mcp_servers = complete_request.get("mcpServers", {})
-            mcp_server_url = next((server.get("url", "") for server in mcp_servers if server.get("name") == mcp_server_name), "")
-            response_content = await call_mcp(tool_name, args, mcp_server_url)
-        else:
-            collection = db["projects"]
-            doc = collection.find_one({"_id": complete_request.get("projectId", "")})
-            signing_secret = doc.get("secret", "")
-            webhook_url = complete_request.get("toolWebhookUrl", "")
-            response_content = await call_webhook(tool_name, args, webhook_url, signing_secret)
+                signing_secret = await project_secrets.get(complete_request.get("projectId", ""))
+                webhook_url = complete_request.get("toolWebhookUrl", "")
+                response_content = await call_webhook(tool_name, args, webhook_url, signing_secret, tool_config.get("idempotent", False))
         return response_content
     except Exception as e:
         logger.error(f"Error in catch_all: {str(e)}")
         return f"Error: {str(e)}"
 
 
+def make_tool_invoker(tool_name: str, tool_config: dict):
+    """on_invoke_tool for a configured tool: catch_all on the turn's ToolExecutor."""
+    async def on_invoke_tool(ctx: RunContextWrapper[Any], args: str) -> str:
+        turn = get_turn_context(ctx)
+        return await turn.tools.run(
+            tool_name,
+            lambda: catch_all(ctx, args, tool_name, tool_config, turn.request)
+        )
+    return on_invoke_tool
+
+
+def tool_kind(tool_config: dict, complete_request: dict) -> str:
+    """Returns how a tool call is served: "mock", "mcp" or "webhook"."""
+    if tool_config.get("mockTool", False) or complete_request.get("testProfile", {}).get("mockTools", False):
+        return "mock"
+    if tool_config.get("isMcp", False):
+        return "mcp"
+    return "webhook"
+
+
 def get_rag_tool(config: dict, complete_request: dict) -> FunctionTool:
     """
     Creates a RAG tool based on the provided configuration.
@@ -167,7 +252,10 @@ def get_rag_tool(config: dict, complete_request: dict) -> FunctionTool:
             name="getArticleInfo",
             description="Get information about an article",
             params_json_schema=params,
-            on_invoke_tool=lambda ctx, args: call_rag_tool(project_id, json.loads(args)['query'], config.get("ragDataSources", []), "chunks", 3)
+            on_invoke_tool=lambda ctx, args: get_turn_context(ctx).tools.run(
+                "getArticleInfo",
+                lambda: call_rag_tool(project_id, json.loads(args)['query'], config.get("ragDataSources", []), "chunks", 3)
+            )
         )
         return tool
     else:
@@ -175,18 +263,56 @@ def get_rag_tool(config: dict, complete_request: dict) -> FunctionTool:
 
 
 
-def get_agents(agent_configs, tool_configs, complete_request):
+def workflow_cache_key(agent_configs, tool_configs, complete_request):
     """
-    Creates and initializes Agent objects based on their configurations and connections.
+    Stable hash of everything that goes into the compiled agent graph.
+
+    Only projectId is taken from the request, since the RAG tool is bound to it.
+    Per-request fields used by tools (testProfile, mcpServers, toolWebhookUrl)
+    are read from the run context at call time and do not split the cache.
+    """
+    return stable_hash({
+        "agents": agent_configs,
+        "tools": tool_configs,
+        "projectId": complete_request.get("projectId", "")
+    })
+
+
+def get_agents(agent_configs, tool_configs, complete_request, index=None, workflow_key=None):
+    """
+    Returns the compiled agents for a workflow, reusing the cached graph when
+    the same agents/tools/project were compiled before.
+
+    workflow_key lets callers that already know the key (stored sessions)
+    skip hashing the configs. The returned agents are shared between requests; per-request data is
+    bound by passing a TurnContext as the run context (see run/run_streamed).
     """
     if not isinstance(agent_configs, list):
         raise ValueError("Agents config is not a list in get_agents")
     if not isinstance(tool_configs, list):
         raise ValueError("Tools config is not a list in get_agents")
 
+    key = workflow_key or workflow_cache_key(agent_configs, tool_configs, complete_request)
+    new_agents = workflow_cache.get(key)
+    if new_agents is not None:
+        logger.debug(f"Reusing compiled workflow {key[:12]}")
+        return new_agents
+
+    # compile_agents edits agent configs (RAG tool and instructions); keep the caller's untouched
+    new_agents = compile_agents(deepcopy(agent_configs), tool_configs, complete_request, index)
+    workflow_cache.set(key, new_agents)
+    return new_agents
+
+
+def compile_agents(agent_configs, tool_configs, complete_request, index=None):
+    """
+    Creates and initializes Agent objects based on their configurations and connections.
+    """
+    if index is None:
+        index = WorkflowIndex(agent_configs, tool_configs)
     new_agents = []
     new_agent_to_children = {}
-    new_agent_name_to_index = {}
+    new_agent_by_name = {}
     # Create Agent objects from config
     for agent_config in agent_configs:
         logger.debug(f"Processing config for agent: {agent_config['name']}")
@@ -195,7 +321,7 @@ def get_agents(agent_configs, tool_configs, complete_request):
 
         # If hasRagSources, append the RAG tool to the agent's tools
         if agent_config.get("hasRagSources", False):
-            rag_tool_name = get_tool_config_by_type(tool_configs, "rag").get("name", "")
+            rag_tool_name = index.get_tool_config_by_type("rag").get("name", "")
             agent_config["tools"].append(rag_tool_name)
             agent_config = add_rag_instructions_to_agent(agent_config, rag_tool_name)
 
@@ -214,7 +340,7 @@ def get_agents(agent_configs, tool_configs, complete_request):
 
         for tool_name in agent_config["tools"]:
 
-            tool_config = get_tool_config_by_name(tool_configs, tool_name)
+            tool_config = index.get_tool_config(tool_name)
 
             if tool_config:
                 external_tools.append({
@@ -229,8 +355,7 @@ def get_agents(agent_configs, tool_configs, complete_request):
                         description=tool_config["description"],
                         params_json_schema=tool_config["parameters"],
                         strict_json_schema=False,
-                    on_invoke_tool=lambda ctx, args, _tool_name=tool_name, _tool_config=tool_config, _complete_request=complete_request:
-                        catch_all(ctx, args, _tool_name, _tool_config, _complete_request)
+                    on_invoke_tool=make_tool_invoker(tool_name, tool_config)
                     )
                 new_tools.append(tool)
                 logger.debug(f"Added tool {tool_name} to agent {agent_config['name']}")
@@ -256,7 +381,7 @@ def get_agents(agent_configs, tool_configs, complete_request):
             )
 
             new_agent_to_children[agent_config["name"]] = agent_config.get("connectedAgents", [])
-            new_agent_name_to_index[agent_config["name"]] = len(new_agents)
+            new_agent_by_name[agent_config["name"]] = new_agent
             new_agents.append(new_agent)
             logger.debug(f"Successfully created agent: {agent_config['name']}")
             print(f"Successfully created agent: {agent_config['name']}")
@@ -270,7 +395,7 @@ def get_agents(agent_configs, tool_configs, complete_request):
         if not hasattr(new_agent, 'handoffs'):
             new_agent.handoffs = []
         # Look up the agent's children from the old agent and create a list called handoffs in new_agent with pointers to the children in new_agents
-        new_agent.handoffs = [new_agents[new_agent_name_to_index[child]] for child in new_agent_to_children[new_agent.name]]
+        new_agent.handoffs = [new_agent_by_name[child] for child in new_agent_to_children[new_agent.name]]
 
     print("Returning created agents")
     print("="*100)
@@ -307,7 +432,8 @@ async def run(
     agent,
     messages,
     external_tools=None,
-    tokens_used=None
+    tokens_used=None,
+    context=None
 ):
     """
     Wrapper function for initializing and running the Swarm client.
@@ -340,7 +466,7 @@ async def run(
     print("Beginning Swarm run")
 
     try:
-        response = await Runner.run(agent, formatted_messages)
+        response = await Runner.run(agent, formatted_messages, context=context)
     except Exception as e:
         logger.error(f"Error during run: {str(e)}")
         print(f"Error during run: {str(e)}")
@@ -354,7 +480,8 @@ async def run_streamed(
     agent,
     messages,
     external_tools=None,
-    tokens_used=None
+    tokens_used=None,
+    context=None
 ):
     """
     Wrapper function for initializing and running the Swarm client in streaming mode.
@@ -388,7 +515,7 @@ async def run_streamed(
 
     try:
         # Use the Runner.run_streamed method
-        stream_result = Runner.run_streamed(agent, formatted_messages)
+        stream_result = Runner.run_streamed(agent, formatted_messages, context=context)
         return stream_result
     except Exception as e:
         logger.error(f"Error during streaming run: {str(e)}")
@@ -0,0 +1,169 @@
+import time
+from dataclasses import dataclass, field
+from typing import Optional
+
+from src.utils.metrics import Counter, LatencyHistogram, render_counter, render_histogram
+
+# Turns and model calls run for seconds to minutes, longer than the default buckets cover
+TURN_LATENCY_BUCKETS = (0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0, 120.0, 300.0)
+
+
+def _ms(seconds):
+    return round(seconds * 1000, 1)
+
+
+@dataclass
+class TurnTelemetry:
+    """
+    Timing and usage of one turn: time to first token, model call latency
+    per agent, tool call latency, handoffs and tokens per model. Returned
+    with the done event and aggregated into turn_metrics.
+    """
+    started_at: float = field(default_factory=time.perf_counter)
+    first_token_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    handoffs: int = 0
+    # (agent, model, seconds) per model call
+    llm_calls: list = field(default_factory=list)
+    # (tool, seconds, error) per tool call, from the turn's ToolExecutor
+    tool_calls: list = field(default_factory=list)
+    # model -> {"total", "prompt", "completion"}
+    tokens_by_model: dict = field(default_factory=dict)
+    _llm_started_at: Optional[float] = None
+    _last_llm_end: Optional[float] = None
+
+    def first_token(self):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+
+    def llm_call_started(self):
+        self._llm_started_at = time.perf_counter()
+
+    def llm_call_completed(self, agent_name, model, usage=None):
+        now = time.perf_counter()
+        # Without a response.created event the call is timed from the previous call (or turn start)
+        start = self._llm_started_at
+        if start is None:
+            start = self.started_at if self._last_llm_end is None else self._last_llm_end
+        self.llm_calls.append((agent_name, model, now - start))
+        self._last_llm_end = now
+        self._llm_started_at = None
+        if usage is not None:
+            self.add_tokens(model, usage.total_tokens, usage.input_tokens, usage.output_tokens)
+
+    def add_tokens(self, model, total, prompt, completion):
+        tokens = self.tokens_by_model.get(model)
+        if tokens is None:
+            tokens = self.tokens_by_model[model] = {"total": 0, "prompt": 0, "completion": 0}
+        tokens["total"] += total
+        tokens["prompt"] += prompt
+        tokens["completion"] += completion
+
+    def handoff(self):
+        self.handoffs += 1
+
+    def total_tokens(self):
+        totals = {"total": 0, "prompt": 0, "completion": 0}
+        for tokens in self.tokens_by_model.values():
+            for key in totals:
+                totals[key] += tokens[key]
+        return totals
+
+    def finish(self, tool_calls=()):
+        if self.finished_at is None:
+            self.finished_at = time.perf_counter()
+            self.tool_calls = list(tool_calls)
+
+    @property
+    def duration(self):
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    @property
+    def ttft(self):
+        return None if self.first_token_at is None else self.first_token_at - self.started_at
+
+    def to_dict(self):
+        llm = {}
+        for agent_name, _, seconds in self.llm_calls:
+            _add_call(llm, agent_name, seconds)
+        tools = {}
+        for tool_name, seconds, error in self.tool_calls:
+            _add_call(tools, tool_name, seconds, error)
+        ttft = self.ttft
+        return {
+            "duration_ms": _ms(self.duration),
+            "ttft_ms": None if ttft is None else _ms(ttft),
+            "handoffs": self.handoffs,
+            "llm": {name: _call_summary(entry) for name, entry in llm.items()},
+            "tools": {name: _call_summary(entry, errors=True) for name, entry in tools.items()},
+            "tokens": self.tokens_by_model
+        }
+
+
+def _add_call(calls, name, seconds, error=False):
+    entry = calls.setdefault(name, [0, 0, 0.0, 0.0])
+    entry[0] += 1
+    entry[1] += int(error)
+    entry[2] += seconds
+    entry[3] = max(entry[3], seconds)
+
+
+def _call_summary(entry, errors=False):
+    summary = {"calls": entry[0], "total_ms": _ms(entry[2]), "max_ms": _ms(entry[3])}
+    if errors:
+        summary["errors"] = entry[1]
+    return summary
+
+
+def record_run_result(result, telemetry):
+    """
+    Adds handoffs and token usage of a non-streamed RunResult to telemetry.
+    The result does not say which agent made each model call, so tokens are
+    attributed to the last agent's model unless the run handed off.
+    """
+    telemetry.handoffs += sum(1 for item in result.new_items if item.type == "handoff_output_item")
+    model = getattr(result.last_agent, 'model', None) if not telemetry.handoffs else None
+    model = model if isinstance(model, str) else "unknown"
+    for model_response in result.raw_responses:
+        usage = model_response.usage
+        telemetry.add_tokens(model, usage.total_tokens, usage.input_tokens, usage.output_tokens)
+
+
+class TurnMetrics:
+    """Process-wide aggregates of finished turns, exported in Prometheus text format."""
+
+    def __init__(self):
+        self.turns = Counter()
+        self.turn_duration = LatencyHistogram(buckets=TURN_LATENCY_BUCKETS)
+        self.ttft = LatencyHistogram(buckets=TURN_LATENCY_BUCKETS)
+        self.llm_latency = LatencyHistogram(buckets=TURN_LATENCY_BUCKETS)
+        self.handoffs = Counter()
+        self.tokens = Counter()
+
+    def record(self, telemetry, status="ok"):
+        self.turns.inc((status,))
+        self.turn_duration.observe((status,), telemetry.duration)
+        if telemetry.ttft is not None:
+            self.ttft.observe((), telemetry.ttft)
+        for agent_name, model, seconds in telemetry.llm_calls:
+            self.llm_latency.observe((agent_name, model), seconds)
+        if telemetry.handoffs:
+            self.handoffs.inc((), telemetry.handoffs)
+        for model, tokens in telemetry.tokens_by_model.items():
+            self.tokens.inc((model, "prompt"), tokens["prompt"])
+            self.tokens.inc((model, "completion"), tokens["completion"])
+
+    def render(self, tool_latency=None):
+        lines = []
+        lines += render_counter("rowboat_turns_total", "Finished turns by status.", self.turns, ("status",))
+        lines += render_histogram("rowboat_turn_duration_seconds", "Turn duration.", self.turn_duration, ("status",))
+        lines += render_histogram("rowboat_time_to_first_token_seconds", "Time from turn start to the first streamed token.", self.ttft)
+        lines += render_histogram("rowboat_llm_call_duration_seconds", "Model call latency.", self.llm_latency, ("agent", "model"))
+        lines += render_counter("rowboat_handoffs_total", "Agent handoffs.", self.handoffs)
+        lines += render_counter("rowboat_tokens_total", "Tokens used by model and kind.", self.tokens, ("model", "kind"))
+        if tool_latency is not None:
+            lines += render_histogram("rowboat_tool_call_duration_seconds", "Tool call latency.", tool_latency, ("kind", "tool"))
+        return "\n".join(lines) + "\n"
+
+
+turn_metrics = TurnMetrics()
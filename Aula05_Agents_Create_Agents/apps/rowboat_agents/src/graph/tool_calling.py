@@ -1,12 +1,13 @@
 from bson.objectid import ObjectId
-from openai import OpenAI
+from openai import AsyncOpenAI
 import os
 from motor.motor_asyncio import AsyncIOMotorClient
 import asyncio
 from dataclasses import dataclass
 from typing import Dict, List, Any
-from qdrant_client import QdrantClient
+from qdrant_client import AsyncQdrantClient
 import json
+from .rag_cache import DocumentCache, EmbeddingCache, ProjectSourceCache, RAGResultCache
 # Initialize MongoDB client
 mongo_uri = os.environ.get("MONGODB_URI", "mongodb://localhost:27017")
 mongo_client = AsyncIOMotorClient(mongo_uri)
@@ -15,16 +16,29 @@ data_sources_collection = db['sources']
 data_source_docs_collection = db['source_docs']
 
 
-qdrant_client = QdrantClient(
+qdrant_client = AsyncQdrantClient(
     url=os.environ.get("QDRANT_URL"),
     api_key=os.environ.get("QDRANT_API_KEY") or None
 )
 # Initialize OpenAI client
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+client = AsyncOpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
 
 # Define embedding model
 embedding_model = "text-embedding-3-small"
 
+# Active source ids per project and query embeddings, reused across RAG calls
+project_sources = ProjectSourceCache(
+    data_sources_collection,
+    ttl_seconds=float(os.environ.get("RAG_SOURCES_TTL", "60"))
+)
+embedding_cache = EmbeddingCache(max_size=int(os.environ.get("RAG_EMBEDDING_CACHE_SIZE", "1024")))
+# Hydrated document contents and recent tool results
+document_cache = DocumentCache(max_bytes=int(os.environ.get("RAG_DOC_CACHE_MAX_BYTES", str(32 * 1024 * 1024))))
+result_cache = RAGResultCache(
+    max_size=int(os.environ.get("RAG_RESULT_CACHE_SIZE", "512")),
+    ttl_seconds=float(os.environ.get("RAG_RESULT_CACHE_TTL", "30"))
+)
+
 async def embed(model: str, value: str) -> dict:
     """
     Generate embeddings using OpenAI's embedding models.
@@ -36,7 +50,7 @@ async def embed(model: str, value: str) -> dict:
     Returns:
         dict: A dictionary containing the embedding.
     """
-    response = client.embeddings.create(
+    response = await client.embeddings.create(
         model=model,
         input=value
     )
@@ -65,20 +79,15 @@ async def call_rag_tool(
 
     print("\n\n calling rag tool \n\n")
     print(query)
-    # Create embedding for the query
-    embed_result = await embed(model=embedding_model, value=query)
-
-    # print(embed_result)
-    # Fetch all active data sources for this project
-    sources = await data_sources_collection.find({
-        "projectId": project_id,
-        "active": True
-    }).to_list(length=None)
+    # Embed the query and fetch the project's active data sources concurrently
+    embed_result, active_source_ids = await asyncio.gather(
+        embedding_cache.embed(embedding_model, query, embed),
+        project_sources.get(project_id)
+    )
 
-    print(sources)
     # Filter sources to those in source_ids
     valid_source_ids = [
-        str(s["_id"]) for s in sources if str(s["_id"]) in source_ids
+        source_id for source_id in source_ids if source_id in active_source_ids
     ]
 
     print(valid_source_ids)
@@ -86,8 +95,13 @@ async def call_rag_tool(
     if not valid_source_ids:
         return ''
 
+    cache_key = RAGResultCache.key(project_id, valid_source_ids, embed_result["embedding"], k, return_type)
+    cached = result_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
     # Perform Qdrant vector search
-    qdrant_results = qdrant_client.search(
+    qdrant_results = await qdrant_client.search(
         collection_name="embeddings",
         query_vector=embed_result["embedding"],
         query_filter={
@@ -116,27 +130,61 @@ async def call_rag_tool(
     print(results)
     # If return_type is 'chunks', return the results directly
     if return_type == "chunks":
-        return json.dumps({"Information": results}, indent=2)
+        formatted_string = json.dumps({"Information": results}, indent=2)
+        result_cache.set(cache_key, formatted_string)
+        return formatted_string
 
-    # Otherwise, fetch the full document contents from MongoDB
-    doc_ids = [ObjectId(r["docId"]) for r in results]
-    docs = await data_source_docs_collection.find({"_id": {"$in": doc_ids}}).to_list(length=None)
-
-    # Create a dictionary for quick lookup of documents by their string ID
-    doc_dict = {str(doc["_id"]): doc for doc in docs}
+    # Otherwise, hydrate the full document contents
+    doc_contents = await hydrate_documents(list({r["docId"] for r in results}))
 
     # Update the results with the full document content
     results = [
-        {**r, "content": doc_dict.get(r["docId"], {}).get("content", "")}
+        {**r, "content": doc_contents.get(r["docId"], "")}
         for r in results
     ]
 
     # Convert results to a JSON string
     formatted_string = json.dumps({"Information": results}, indent=2)
-    print(formatted_string)
+    result_cache.set(cache_key, formatted_string)
     return formatted_string
 
 
+async def hydrate_documents(doc_ids: list[str]) -> dict:
+    """
+    Returns {docId: content}. Only the versions are read for every doc;
+    content is fetched from MongoDB just for (docId, version) pairs that are
+    not in document_cache. Only docs with status "ready" are cached: the rag
+    workers write content after indexing, under the same version.
+    """
+    versions = await data_source_docs_collection.find(
+        {"_id": {"$in": [ObjectId(doc_id) for doc_id in doc_ids]}},
+        {"version": 1}
+    ).to_list(length=None)
+
+    contents = {}
+    missing = {}
+    for doc in versions:
+        doc_id, version = str(doc["_id"]), doc.get("version")
+        content = document_cache.get(doc_id, version)
+        if content is None:
+            missing[doc_id] = version
+        else:
+            contents[doc_id] = content
+
+    if missing:
+        docs = await data_source_docs_collection.find(
+            {"_id": {"$in": [ObjectId(doc_id) for doc_id in missing]}},
+            {"content": 1, "version": 1, "status": 1}
+        ).to_list(length=None)
+        for doc in docs:
+            doc_id = str(doc["_id"])
+            content = doc.get("content", "")
+            contents[doc_id] = content
+            if content and doc.get("status") == "ready":
+                document_cache.set(doc_id, doc.get("version"), content)
+    return contents
+
+
 if __name__ == "__main__":
     asyncio.run(call_rag_tool(
         project_id="faf2bfb3-41d4-4299-b0d2-048581ea9bd8",
@@ -0,0 +1,131 @@
+import asyncio
+import os
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from src.utils.common import common_logger as logger
+
+# Statuses where the server shed the request without running it; retried only
+# when it says when to come back (Retry-After)
+SHED_STATUSES = {429, 503}
+# Statuses that may come after the tool already ran; retried only for idempotent tools
+IDEMPOTENT_RETRY_STATUSES = {429, 502, 503, 504}
+# Longest Retry-After honoured before giving up and returning the response
+MAX_RETRY_AFTER = 10.0
+
+
+def retry_after_seconds(response):
+    """Returns the Retry-After delay in seconds, or None if missing or not a number of seconds."""
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+
+class WebhookSessionPool:
+    """
+    One keep-alive aiohttp session per webhook host, shared by every tool
+    call in the process, so repeated calls skip DNS + TCP + TLS setup.
+
+    Sessions are created lazily on the running loop and closed by close()
+    (wired to the app's after_serving hook).
+    """
+
+    def __init__(
+        self,
+        limit_per_host=32,
+        total_limit=256,
+        keepalive_timeout=60.0,
+        timeout=30.0,
+        connect_timeout=5.0,
+        max_retries=2,
+        backoff=0.25
+    ):
+        self.limit_per_host = limit_per_host
+        self.total_limit = total_limit
+        self.keepalive_timeout = keepalive_timeout
+        self.timeout = timeout
+        self.connect_timeout = connect_timeout
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self._sessions = {}
+        self.retries = 0
+
+    @staticmethod
+    def host_key(url):
+        parts = urlsplit(url)
+        return f"{parts.scheme}://{parts.netloc}"
+
+    def session_for(self, url):
+        key = self.host_key(url)
+        session = self._sessions.get(key)
+        if session is None or session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=self.total_limit,
+                limit_per_host=self.limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                ttl_dns_cache=300
+            )
+            session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout, connect=self.connect_timeout)
+            )
+            self._sessions[key] = session
+        return session
+
+    async def post_json(self, url, payload, headers=None, timeout=None, idempotent=False):
+        """
+        POSTs payload and returns (status, body_text).
+
+        A tool call may have side effects, so by default only failures where
+        the request never reached the tool are retried: connection setup
+        errors, and 429/503 responses carrying Retry-After. With idempotent=True,
+        timeouts, dropped connections and 502/504 are retried as well.
+        """
+        session = self.session_for(url)
+        request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+        retry_errors = (aiohttp.ClientConnectionError, asyncio.TimeoutError) if idempotent else aiohttp.ClientConnectorError
+        attempt = 0
+        while True:
+            delay = self.backoff * (2 ** attempt)
+            try:
+                async with session.post(url, json=payload, headers=headers, timeout=request_timeout) as response:
+                    body = await response.text()
+                    if attempt >= self.max_retries:
+                        return response.status, body
+                    retry_after = retry_after_seconds(response)
+                    if response.status in SHED_STATUSES and retry_after is not None and retry_after <= MAX_RETRY_AFTER:
+                        delay = retry_after
+                    elif not (idempotent and response.status in IDEMPOTENT_RETRY_STATUSES):
+                        return response.status, body
+            except retry_errors as e:
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning(f"Webhook call to {self.host_key(url)} failed ({e!r}), retrying")
+            attempt += 1
+            self.retries += 1
+            await asyncio.sleep(delay)
+
+    async def close(self):
+        sessions, self._sessions = list(self._sessions.values()), {}
+        for session in sessions:
+            await session.close()
+
+    def stats(self):
+        return {
+            "hosts": len(self._sessions),
+            "limit_per_host": self.limit_per_host,
+            "retries": self.retries
+        }
+
+
+webhook_pool = WebhookSessionPool(
+    limit_per_host=int(os.environ.get("WEBHOOK_LIMIT_PER_HOST", "32")),
+    total_limit=int(os.environ.get("WEBHOOK_TOTAL_LIMIT", "256")),
+    keepalive_timeout=float(os.environ.get("WEBHOOK_KEEPALIVE_TIMEOUT", "60")),
+    timeout=float(os.environ.get("WEBHOOK_TIMEOUT", "30")),
+    connect_timeout=float(os.environ.get("WEBHOOK_CONNECT_TIMEOUT", "5")),
+    max_retries=int(os.environ.get("WEBHOOK_MAX_RETRIES", "2")),
+    backoff=float(os.environ.get("WEBHOOK_RETRY_BACKOFF", "0.25"))
+)
@@ -0,0 +1,138 @@
+import asyncio
+import hashlib
+import json
+import time
+from collections import OrderedDict
+
+# Returned by get(key, MISSING) so cached None values can be told apart from misses
+MISSING = object()
+
+
+def stable_hash(value):
+    """Returns a sha256 of the canonical JSON encoding of value (key order independent)."""
+    payload = json.dumps(value, sort_keys=True, separators=(',', ':'), default=str)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class LRUCache:
+    """Small in-process LRU cache with hit/miss counters."""
+
+    def __init__(self, max_size=128):
+        self.max_size = max_size
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def clear(self):
+        self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / total, 4) if total else 0.0
+        }
+
+
+class TTLCache(LRUCache):
+    """LRU cache whose entries expire ttl_seconds after they were set."""
+
+    def __init__(self, max_size=1024, ttl_seconds=300):
+        super().__init__(max_size=max_size)
+        self.ttl_seconds = ttl_seconds
+
+    def get(self, key, default=None):
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > time.monotonic():
+                self._data.move_to_end(key)
+                self.hits += 1
+                return value
+            del self._data[key]
+        self.misses += 1
+        return default
+
+    def set(self, key, value, ttl_seconds=None):
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        super().set(key, (time.monotonic() + ttl, value))
+
+    def pop(self, key, default=None):
+        entry = self._data.pop(key, None)
+        return default if entry is None else entry[1]
+
+    def __contains__(self, key):
+        entry = self._data.get(key)
+        return entry is not None and entry[0] > time.monotonic()
+
+
+class AsyncLoadingCache(TTLCache):
+    """
+    TTLCache filled by an async loader. Concurrent misses for the same key
+    share one load; ttl_for(value) may return a different TTL per value
+    (e.g. a short one for negative results). A load that is in flight when
+    its key is invalidated still returns to its callers but is not cached.
+    """
+
+    def __init__(self, loader, max_size=1024, ttl_seconds=300, ttl_for=None):
+        super().__init__(max_size=max_size, ttl_seconds=ttl_seconds)
+        self.loader = loader
+        self.ttl_for = ttl_for
+        self._loading = {}
+
+    async def get_or_load(self, key):
+        value = self.get(key, MISSING)
+        if value is not MISSING:
+            return value
+        loading = self._loading.get(key)
+        if loading is None:
+            loading = asyncio.ensure_future(self._load(key))
+            self._loading[key] = loading
+            loading.add_done_callback(lambda done: self._forget_load(key, done))
+        return await asyncio.shield(loading)
+
+    def _forget_load(self, key, task):
+        if self._loading.get(key) is task:
+            del self._loading[key]
+
+    async def _load(self, key):
+        value = await self.loader(key)
+        # invalidate() drops the in-flight entry; only a load still registered may store its value
+        if self._loading.get(key) is asyncio.current_task():
+            self.set(key, value, ttl_seconds=self.ttl_for(value) if self.ttl_for else None)
+        return value
+
+    def invalidate(self, key=None):
+        """Drops one key, or everything when key is None, including loads in flight."""
+        if key is None:
+            self._loading.clear()
+            self.clear()
+        else:
+            self._loading.pop(key, None)
+            self.pop(key)
@@ -1,11 +1,15 @@
+import atexit
 import json
 import logging
+import logging.handlers
 import os
+import queue
+import random
 import subprocess
 import sys
 import time
 from dotenv import load_dotenv
-from openai import OpenAI
+from openai import AsyncOpenAI, OpenAI
 
 load_dotenv()
 
@@ -35,6 +39,72 @@ def setup_logger(name, log_file='./run.log', level=logging.INFO, log_to_file=Fal
 common_logger = setup_logger('logger')
 logger = common_logger
 
+
+def setup_queued_logger(name, level=logging.INFO):
+    """
+    Logger whose records are formatted and written to stderr by a background
+    thread (QueueHandler + QueueListener), so logging from the event loop
+    never blocks on the stream.
+    """
+    formatter = logging.Formatter('%(asctime)s %(levelname)s [%(filename)s:%(lineno)d] %(message)s')
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(formatter)
+
+    log_queue = queue.SimpleQueue()
+    listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+
+    logger = logging.getLogger(name)
+    logger.setLevel(level)
+    if logger.hasHandlers():
+        logger.handlers.clear()
+    logger.propagate = False
+    logger.addHandler(logging.handlers.QueueHandler(log_queue))
+    return logger
+
+
+class EventLogger:
+    """
+    Level-gated logging for the streaming hot path.
+
+    Messages use %-style arguments so nothing is formatted unless the level
+    is enabled. Full payloads (raw SDK events, request bodies) are only
+    logged at DEBUG and, even then, only for a sampled fraction of calls.
+    """
+
+    def __init__(self, logger, payload_sample_rate=1.0):
+        self.logger = logger
+        self.payload_sample_rate = payload_sample_rate
+
+    @property
+    def debug_enabled(self):
+        return self.logger.isEnabledFor(logging.DEBUG)
+
+    def debug(self, msg, *args):
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug(msg, *args, stacklevel=2)
+
+    def info(self, msg, *args):
+        if self.logger.isEnabledFor(logging.INFO):
+            self.logger.info(msg, *args, stacklevel=2)
+
+    def error(self, msg, *args, exc_info=False):
+        self.logger.error(msg, *args, exc_info=exc_info, stacklevel=2)
+
+    def payload(self, label, payload):
+        if not self.logger.isEnabledFor(logging.DEBUG):
+            return
+        if self.payload_sample_rate < 1.0 and random.random() >= self.payload_sample_rate:
+            return
+        self.logger.debug("%s: %r", label, payload, stacklevel=2)
+
+
+event_logger = EventLogger(
+    setup_queued_logger('events', level=os.environ.get('EVENT_LOG_LEVEL', 'INFO').upper()),
+    payload_sample_rate=float(os.environ.get('EVENT_LOG_PAYLOAD_SAMPLE_RATE', '1.0'))
+)
+
 def read_json_from_file(file_name):
     logger.info(f"Reading json from {file_name}")
     try:
@@ -56,6 +126,9 @@ def get_api_key(key_name):
 openai_client = OpenAI(
     api_key=get_api_key("OPENAI_API_KEY")
 )
+async_openai_client = AsyncOpenAI(
+    api_key=get_api_key("OPENAI_API_KEY")
+)
 
 def generate_gpt4o_output_from_multi_turn_conv(messages, output_type='json', model="gpt-4o"):
     return generate_openai_output(messages, output_type, model)
@@ -82,6 +155,28 @@ def generate_openai_output(messages, output_type='not_json', model="gpt-4o", ret
         logger.error(e)
         return None
 
+async def generate_openai_output_async(messages, output_type='not_json', model="gpt-4o", return_completion=False):
+    try:
+        if output_type == 'json':
+            chat_completion = await async_openai_client.chat.completions.create(
+                messages=messages,
+                model=model,
+                response_format={"type": "json_object"}
+            )
+        else:
+            chat_completion = await async_openai_client.chat.completions.create(
+                messages=messages,
+                model=model,
+            )
+
+        if return_completion:
+            return chat_completion
+        return chat_completion.choices[0].message.content
+
+    except Exception as e:
+        logger.error(e)
+        return None
+
 def generate_llm_output(messages, model):
     model_provider = None
     if "gpt" in model:
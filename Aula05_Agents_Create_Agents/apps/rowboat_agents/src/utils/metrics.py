@@ -0,0 +1,109 @@
+import bisect
+import time
+from contextlib import contextmanager
+
+# Upper bounds in seconds, Prometheus-style (the last bucket is +Inf)
+DEFAULT_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class LatencyHistogram:
+    """Cumulative latency histograms keyed by a label tuple (e.g. (kind, tool_name))."""
+
+    def __init__(self, buckets=DEFAULT_LATENCY_BUCKETS):
+        self.buckets = tuple(buckets)
+        self._series = {}
+
+    def observe(self, labels, seconds):
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = {
+                "counts": [0] * (len(self.buckets) + 1),
+                "count": 0,
+                "sum": 0.0,
+                "max": 0.0
+            }
+        series["counts"][bisect.bisect_left(self.buckets, seconds)] += 1
+        series["count"] += 1
+        series["sum"] += seconds
+        series["max"] = max(series["max"], seconds)
+
+    @contextmanager
+    def time(self, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(labels, time.perf_counter() - start)
+
+    def series(self):
+        """Yields (labels, cumulative bucket counts, count, sum) for every series."""
+        for labels, series in self._series.items():
+            cumulative = []
+            running = 0
+            for count in series["counts"]:
+                running += count
+                cumulative.append(running)
+            yield labels, cumulative, series["count"], series["sum"]
+
+    def snapshot(self):
+        out = []
+        for labels, series in self._series.items():
+            out.append({
+                "labels": list(labels),
+                "count": series["count"],
+                "avg_ms": round(series["sum"] / series["count"] * 1000, 2),
+                "max_ms": round(series["max"] * 1000, 2),
+                "buckets": {
+                    ("+Inf" if i == len(self.buckets) else str(self.buckets[i])): count
+                    for i, count in enumerate(series["counts"]) if count
+                }
+            })
+        return out
+
+
+class Counter:
+    """Monotonic counters keyed by a label tuple."""
+
+    def __init__(self):
+        self._values = {}
+
+    def inc(self, labels=(), amount=1):
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def series(self):
+        """Yields (labels, value) for every series."""
+        yield from self._values.items()
+
+    def snapshot(self):
+        return [{"labels": list(labels), "value": value} for labels, value in self._values.items()]
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label(value)}"' for name, value in zip(names, values)) + "}"
+
+
+def render_counter(name, help_text, counter, label_names=()):
+    """Prometheus text exposition lines for a Counter."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+    for labels, value in counter.series():
+        lines.append(f"{name}{_format_labels(label_names, labels)} {value}")
+    return lines
+
+
+def render_histogram(name, help_text, histogram, label_names=()):
+    """Prometheus text exposition lines for a LatencyHistogram."""
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} histogram"]
+    bounds = [str(bound) for bound in histogram.buckets] + ["+Inf"]
+    names = tuple(label_names) + ("le",)
+    for labels, cumulative, count, total in histogram.series():
+        for bound, value in zip(bounds, cumulative):
+            lines.append(f"{name}_bucket{_format_labels(names, tuple(labels) + (bound,))} {value}")
+        lines.append(f"{name}_sum{_format_labels(label_names, labels)} {total}")
+        lines.append(f"{name}_count{_format_labels(label_names, labels)} {count}")
+    return lines
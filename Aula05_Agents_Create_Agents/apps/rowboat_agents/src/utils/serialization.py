@@ -0,0 +1,82 @@
+import json
+import os
+
+from src.utils.common import common_logger as logger
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSONSerializer:
+    """Standard library json; always available."""
+
+    name = "json"
+
+    def dumps(self, obj):
+        return json.dumps(obj)
+
+    def dumps_bytes(self, obj):
+        return json.dumps(obj).encode("utf-8")
+
+    def loads(self, data):
+        return json.loads(data)
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    orjson, which is several times faster on large tool outputs. Output is
+    compact and not ASCII-escaped; anything orjson rejects (e.g. unsupported
+    types) goes through the standard library so behaviour matches json.
+    """
+
+    name = "orjson"
+    options = orjson.OPT_NON_STR_KEYS if orjson else 0
+
+    def dumps(self, obj):
+        return self.dumps_bytes(obj).decode("utf-8")
+
+    def dumps_bytes(self, obj):
+        try:
+            return orjson.dumps(obj, option=self.options)
+        except orjson.JSONEncodeError:
+            return super().dumps_bytes(obj)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+def get_serializer(name=None):
+    """Returns the named serializer ("json" or "orjson"), or orjson when available if name is empty."""
+    name = (name or "").strip().lower()
+    if name == "json":
+        return JSONSerializer()
+    if orjson is None:
+        if name == "orjson":
+            logger.warning("JSON_SERIALIZER=orjson but orjson is not installed, using json")
+        return JSONSerializer()
+    return OrjsonSerializer()
+
+
+serializer = get_serializer(os.environ.get("JSON_SERIALIZER"))
+dumps = serializer.dumps
+loads = serializer.loads
+
+# SSE frames are "event: <name>\ndata: <json>\n\n"; the fixed parts are encoded once
+SSE_DATA_PREFIX = b"data: "
+SSE_FRAME_END = b"\n\n"
+_sse_prefixes = {}
+
+
+def sse_prefix(event):
+    prefix = _sse_prefixes.get(event)
+    if prefix is None:
+        prefix = _sse_prefixes[event] = b"event: " + event.encode("utf-8") + b"\n" + SSE_DATA_PREFIX
+    return prefix
+
+
+def format_sse(data, event=None, serializer=serializer):
+    """Encodes one server-sent event as bytes."""
+    prefix = SSE_DATA_PREFIX if event is None else sse_prefix(event)
+    return prefix + serializer.dumps_bytes(data) + SSE_FRAME_END
@@ -0,0 +1,96 @@
+"""
+Micro-benchmark of SSE event encoding for /chat_stream, replaying the
+messages and final state of the tests/sample_requests fixtures as
+"message" and "done" events.
+
+Compares the previous encoder (f-string around json.dumps, encoded to
+bytes as the server does) with format_sse on the json and orjson
+serializers. --tool-output-kb appends a synthetic web-search style tool
+result of that size to each fixture, since large tool outputs dominate
+real streams.
+
+Usage (from the rowboat_agents directory):
+    python -m tests.benchmark_sse_serialization --tool-output-kb 64
+"""
+import argparse
+import glob
+import json
+import os
+import time
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.utils.serialization import JSONSerializer, OrjsonSerializer, format_sse, orjson  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), "sample_requests", "*.json")
+
+
+def legacy_format_sse(data, event=None):
+    msg = f"data: {json.dumps(data)}\n\n"
+    if event is not None:
+        msg = f"event: {event}\n{msg}"
+    return msg.encode("utf-8")
+
+
+def tool_output_message(size_kb):
+    results = []
+    while len(json.dumps(results)) < size_kb * 1024:
+        i = len(results)
+        results.append({
+            "title": f"Result {i}",
+            "url": f"https://example.com/articles/{i}",
+            "snippet": "Lorem ipsum dolor sit amet, consectetur adipiscing elit — ünïcödé. " * 4,
+        })
+    return {
+        "content": json.dumps(results),
+        "role": "tool",
+        "sender": None,
+        "tool_calls": None,
+        "tool_call_id": "call_benchmark",
+        "tool_name": "web_search",
+        "response_type": "internal",
+    }
+
+
+def load_events(tool_output_kb):
+    events = []
+    for path in sorted(glob.glob(FIXTURES)):
+        with open(path) as file:
+            request = json.load(file)["lastRequest"]
+        for message in request.get("messages", []):
+            events.append(("message", message))
+        if tool_output_kb:
+            events.append(("message", tool_output_message(tool_output_kb)))
+        events.append(("done", {"state": request.get("state", {})}))
+    return events
+
+
+def bench(name, encode, events, iterations):
+    total_bytes = 0
+    start = time.perf_counter()
+    for _ in range(iterations):
+        for event_type, data in events:
+            total_bytes += len(encode(data, event_type))
+    elapsed = time.perf_counter() - start
+    n = len(events) * iterations
+    print(f"{name:>8}: {n / elapsed:12,.0f} events/s  {total_bytes / elapsed / 1e6:8.1f} MB/s")
+    return n / elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--iterations", type=int, default=200)
+    parser.add_argument("--tool-output-kb", type=int, default=0)
+    args = parser.parse_args()
+
+    events = load_events(args.tool_output_kb)
+    print(f"{len(events)} events from {FIXTURES}")
+    legacy = bench("legacy", legacy_format_sse, events, args.iterations)
+    json_serializer = JSONSerializer()
+    bench("json", lambda data, event: format_sse(data, event, json_serializer), events, args.iterations)
+    if orjson is None:
+        print("  orjson: not installed")
+    else:
+        orjson_serializer = OrjsonSerializer()
+        fast = bench("orjson", lambda data, event: format_sse(data, event, orjson_serializer), events, args.iterations)
+        print(f"speedup: {fast / legacy:.1f}x")
@@ -0,0 +1,441 @@
+"""
+Replay benchmark of the per-event work in run_turn_streamed: the previous
+inline if/hasattr chain against StreamEventTranslator, on recorded-shape
+event streams (openai-agents event wrappers around openai response models).
+
+Each simulated turn streams --deltas text deltas and a usage event per
+model call, plus a handoff, a function tool call and output, a web search
+call and results, and a final message with a URL citation. Both
+translators first run once over the stream and must produce the same
+messages (generated ids are made deterministic for the check).
+
+Usage (from the rowboat_agents directory):
+    python -m tests.benchmark_stream_events --turns 200 --deltas 300
+"""
+import argparse
+import itertools
+import os
+import time
+import uuid
+from types import SimpleNamespace
+from unittest import mock
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from openai.types.responses import (  # noqa: E402
+    ResponseCompletedEvent,
+    ResponseFunctionToolCall,
+    ResponseFunctionWebSearch,
+    ResponseOutputMessage,
+    ResponseOutputText,
+    ResponseTextDeltaEvent,
+    ResponseUsage,
+)
+from openai.types.responses.response_output_text import AnnotationURLCitation  # noqa: E402
+
+from src.graph.stream_events import StreamEventTranslator  # noqa: E402
+from src.utils.serialization import dumps as json_dumps  # noqa: E402
+
+
+def legacy_translate(events, current_agent, tokens_used):
+    """The event handling loop of run_turn_streamed before StreamEventTranslator (logging removed)."""
+    for event in events:
+
+        # Handle raw response events and accumulate tokens
+        if event.type == "raw_response_event":
+            if hasattr(event.data, 'type') and event.data.type == "response.completed":
+                if hasattr(event.data.response, 'usage'):
+                    tokens_used["total"] += event.data.response.usage.total_tokens
+                    tokens_used["prompt"] += event.data.response.usage.input_tokens
+                    tokens_used["completion"] += event.data.response.usage.output_tokens
+
+            # Handle ResponseFunctionWebSearch specifically
+            if hasattr(event, 'data') and hasattr(event.data, 'raw_item'):
+                raw_item = event.data.raw_item
+
+                # Check if it's a web search call
+                if (hasattr(raw_item, 'type') and raw_item.type == 'web_search_call') or (
+                    isinstance(raw_item, dict) and raw_item.get('type') == 'web_search_call'
+                ):
+                    # Get call_id safely, regardless of structure
+                    call_id = None
+                    if hasattr(raw_item, 'id'):
+                        call_id = raw_item.id
+                    elif isinstance(raw_item, dict) and 'id' in raw_item:
+                        call_id = raw_item['id']
+                    else:
+                        call_id = str(uuid.uuid4())
+
+                    # Get status safely
+                    status = 'unknown'
+                    if hasattr(raw_item, 'status'):
+                        status = raw_item.status
+                    elif isinstance(raw_item, dict) and 'status' in raw_item:
+                        status = raw_item['status']
+
+                    # Emit a tool call for web search
+                    message = {
+                        'content': None,
+                        'role': 'assistant',
+                        'sender': current_agent.name if current_agent else None,
+                        'tool_calls': [{
+                            'function': {
+                                'name': 'web_search',
+                                'arguments': json_dumps({
+                                    'search_id': call_id,
+                                    'status': status
+                                })
+                            },
+                            'id': call_id,
+                            'type': 'function'
+                        }],
+                        'tool_call_id': None,
+                        'tool_name': None,
+                        'response_type': 'internal'
+                    }
+                    yield ('message', message)
+
+            continue
+
+        # Update current agent when it changes
+        elif event.type == "agent_updated_stream_event":
+            if current_agent.name == event.new_agent.name:
+                continue
+
+            tool_call_id = str(uuid.uuid4())
+
+            # yield the transfer invocation
+            message = {
+                'content': None,
+                'role': 'assistant',
+                'sender': current_agent.name,
+                'tool_calls': [{
+                    'function': {
+                        'name': 'transfer_to_agent',
+                        'arguments': json_dumps({
+                            'assistant': event.new_agent.name
+                        })
+                    },
+                    'id': tool_call_id,
+                    'type': 'function'
+                }],
+                'tool_call_id': None,
+                'tool_name': None,
+                'response_type': 'internal'
+            }
+            yield ('message', message)
+
+            # yield the transfer result
+            message = {
+                'content': json_dumps({
+                    'assistant': event.new_agent.name
+                }),
+                'role': 'tool',
+                'sender': None,
+                'tool_calls': None,
+                'tool_call_id': tool_call_id,
+                'tool_name': 'transfer_to_agent',
+            }
+            yield ('message', message)
+
+            current_agent = event.new_agent
+            continue
+
+        # Handle run items (tools, messages, etc)
+        elif event.type == "run_item_stream_event":
+            current_agent = event.item.agent
+            if event.item.type == "tool_call_item":
+                # Check if it's a ResponseFunctionWebSearch object
+                if hasattr(event.item.raw_item, 'type') and event.item.raw_item.type == 'web_search_call':
+                    call_id = event.item.raw_item.id if hasattr(event.item.raw_item, 'id') else str(uuid.uuid4())
+                    message = {
+                        'content': None,
+                        'role': 'assistant',
+                        'sender': current_agent.name if current_agent else None,
+                        'tool_calls': [{
+                            'function': {
+                                'name': 'web_search',
+                                'arguments': json_dumps({
+                                    'search_id': call_id
+                                })
+                            },
+                            'id': call_id,
+                            'type': 'function'
+                        }],
+                        'tool_call_id': None,
+                        'tool_name': None,
+                        'response_type': 'internal'
+                    }
+                    yield ('message', message)
+
+                    result_message = {
+                    'content': "Web search done",
+                    'role': 'tool',
+                    'sender': None,
+                    'tool_calls': None,
+                    'tool_call_id': call_id,
+                    'tool_name': 'web_search',
+                    'response_type': 'internal'
+                    }
+
+                    yield ('message', result_message)
+                else:
+                    # Handle normal tool calls
+                    message = {
+                        'content': None,
+                        'role': 'assistant',
+                        'sender': current_agent.name if current_agent else None,
+                        'tool_calls': [{
+                            'function': {
+                                'name': event.item.raw_item.name,
+                                'arguments': event.item.raw_item.arguments
+                            },
+                            'id': event.item.raw_item.call_id,
+                            'type': 'function'
+                        }],
+                        'tool_call_id': None,
+                        'tool_name': None,
+                        'response_type': 'internal'
+                    }
+                    yield ('message', message)
+
+            elif event.item.type == "tool_call_output_item":
+                # Check if it's a web search result
+                if isinstance(event.item.raw_item, dict) and event.item.raw_item.get('type') == 'web_search_results':
+                    call_id = event.item.raw_item.get('search_id', event.item.raw_item.get('id', str(uuid.uuid4())))
+                    message = {
+                        'content': str(event.item.output),
+                        'role': 'tool',
+                        'sender': None,
+                        'tool_calls': None,
+                        'tool_call_id': call_id,
+                        'tool_name': 'web_search',
+                        'response_type': 'internal'
+                    }
+                else:
+                    # Safe extraction of call_id and name
+                    call_id = None
+                    tool_name = None
+
+                    # Handle different types of raw_item
+                    if isinstance(event.item.raw_item, dict):
+                        call_id = event.item.raw_item.get('call_id')
+                        tool_name = event.item.raw_item.get('name')
+                    elif hasattr(event.item.raw_item, 'call_id'):
+                        call_id = event.item.raw_item.call_id
+                        if hasattr(event.item.raw_item, 'name'):
+                            tool_name = event.item.raw_item.name
+
+                    message = {
+                        'content': str(event.item.output),
+                        'role': 'tool',
+                        'sender': None,
+                        'tool_calls': None,
+                        'tool_call_id': call_id,
+                        'tool_name': tool_name,
+                        'response_type': 'internal'
+                    }
+
+                yield ('message', message)
+
+            elif event.item.type == "message_output_item":
+                content = ""
+                url_citations = []
+
+                # Extract text content and any URL citations
+                if hasattr(event.item.raw_item, 'content'):
+                    for content_item in event.item.raw_item.content:
+                        # Handle text content
+                        if hasattr(content_item, 'text'):
+                            content += content_item.text
+
+                        # Extract URL citations if present
+                        if hasattr(content_item, 'annotations'):
+                            for annotation in content_item.annotations:
+                                if hasattr(annotation, 'type') and annotation.type == 'url_citation':
+                                    citation = {
+                                        'url': annotation.url if hasattr(annotation, 'url') else '',
+                                        'title': annotation.title if hasattr(annotation, 'title') else '',
+                                        'start_index': annotation.start_index if hasattr(annotation, 'start_index') else 0,
+                                        'end_index': annotation.end_index if hasattr(annotation, 'end_index') else 0
+                                    }
+                                    url_citations.append(citation)
+
+                # Create message with URL citations if they exist
+                message = {
+                    'content': content,
+                    'role': 'assistant',
+                    'sender': current_agent.name,
+                    'tool_calls': None,
+                    'tool_call_id': None,
+                    'tool_name': None,
+                    'response_type': 'external'
+                }
+
+                # Add citations if any were found
+                if url_citations:
+                    message['citations'] = url_citations
+
+                yield ('message', message)
+
+            # Handle web search function call events
+            elif event.item.type == "web_search_call_item" or (hasattr(event.item, 'raw_item') and hasattr(event.item.raw_item, 'type') and event.item.raw_item.type == 'web_search_call'):
+                # Extract web search call ID if available
+                call_id = None
+                if hasattr(event.item.raw_item, 'id'):
+                    call_id = event.item.raw_item.id
+
+                message = {
+                    'content': None,
+                    'role': 'assistant',
+                    'sender': current_agent.name if current_agent else None,
+                    'tool_calls': [{
+                        'function': {
+                            'name': 'web_search',
+                            'arguments': json_dumps({
+                                'search_id': call_id
+                            })
+                        },
+                        'id': call_id or str(uuid.uuid4()),
+                        'type': 'function'
+                    }],
+                    'tool_call_id': None,
+                    'tool_name': None,
+                    'response_type': 'internal'
+                }
+                yield ('message', message)
+
+            # Handle web search results
+            elif event.item.type == "web_search_results_item" or (
+                hasattr(event.item, 'raw_item') and (
+                    (hasattr(event.item.raw_item, 'type') and event.item.raw_item.type == 'web_search_results') or
+                    (isinstance(event.item.raw_item, dict) and event.item.raw_item.get('type') == 'web_search_results')
+                )
+            ):
+                # Extract call_id safely
+                call_id = None
+                raw_item = event.item.raw_item
+
+                # Try several ways to get the search_id or id
+                if hasattr(raw_item, 'search_id'):
+                    call_id = raw_item.search_id
+                elif isinstance(raw_item, dict) and 'search_id' in raw_item:
+                    call_id = raw_item['search_id']
+                elif hasattr(raw_item, 'id'):
+                    call_id = raw_item.id
+                elif isinstance(raw_item, dict) and 'id' in raw_item:
+                    call_id = raw_item['id']
+                else:
+                    call_id = str(uuid.uuid4())
+
+                # Extract results content safely
+                results = {}
+
+                # Try event.item.output first
+                if hasattr(event.item, 'output'):
+                    results = event.item.output
+                # Then try raw_item.results
+                elif hasattr(raw_item, 'results'):
+                    results = raw_item.results
+                elif isinstance(raw_item, dict) and 'results' in raw_item:
+                    results = raw_item['results']
+
+                # Format the results for output
+                results_str = ""
+                try:
+                    results_str = json_dumps(results) if results else ""
+                except Exception as e:
+                    results_str = str(results)
+
+                message = {
+                    'content': results_str,
+                    'role': 'tool',
+                    'sender': None,
+                    'tool_calls': None,
+                    'tool_call_id': call_id,
+                    'tool_name': 'web_search',
+                    'response_type': 'internal'
+                }
+                yield ('message', message)
+
+
+def raw_event(data):
+    return SimpleNamespace(type="raw_response_event", data=data)
+
+
+def item_event(item_type, agent, raw_item, **fields):
+    return SimpleNamespace(type="run_item_stream_event", item=SimpleNamespace(type=item_type, agent=agent, raw_item=raw_item, **fields))
+
+
+def usage_event():
+    usage = ResponseUsage.model_construct(total_tokens=150, input_tokens=100, output_tokens=50)
+    return raw_event(ResponseCompletedEvent.model_construct(type="response.completed", response=SimpleNamespace(usage=usage)))
+
+
+def record_turn(deltas):
+    """One turn of stream events; raw data and raw items are openai response models, as the SDK emits."""
+    triage, support = SimpleNamespace(name="Triage"), SimpleNamespace(name="Support")
+    delta = raw_event(ResponseTextDeltaEvent.model_construct(
+        type="response.output_text.delta", delta="tok", item_id="msg_1", output_index=0, content_index=0))
+    citation = AnnotationURLCitation.model_construct(type="url_citation", url="https://example.com", title="Example", start_index=0, end_index=5)
+    text = ResponseOutputText.model_construct(type="output_text", text="Here is what I found.", annotations=[citation])
+    events = [delta] * (deltas // 2)
+    events += [
+        usage_event(),
+        SimpleNamespace(type="agent_updated_stream_event", new_agent=support),
+        item_event("tool_call_item", support, ResponseFunctionToolCall.model_construct(
+            type="function_call", call_id="call_1", name="get_order", arguments='{"id": 42}')),
+        item_event("tool_call_output_item", support, {"call_id": "call_1", "output": '{"status": "shipped"}', "type": "function_call_output"},
+                   output='{"status": "shipped"}'),
+        usage_event(),
+        item_event("tool_call_item", support, ResponseFunctionWebSearch.model_construct(type="web_search_call", id="ws_1", status="completed")),
+        item_event("tool_call_output_item", support, {"type": "web_search_results", "search_id": "ws_1"}, output="results"),
+        item_event("message_output_item", support, ResponseOutputMessage.model_construct(
+            type="message", id="msg_1", role="assistant", status="completed", content=[text])),
+    ]
+    events += [delta] * (deltas - deltas // 2)
+    events.append(usage_event())
+    return triage, events
+
+
+def run_legacy(agent, events):
+    return [message for _, message in legacy_translate(events, agent, {"total": 0, "prompt": 0, "completion": 0})]
+
+
+def run_translator(agent, events):
+    translator = StreamEventTranslator(agent, {"total": 0, "prompt": 0, "completion": 0})
+    return [message.to_dict() for event in events for message in translator.translate(event)]
+
+
+def check_equivalent(agent, events):
+    outputs = []
+    for fn in (run_legacy, run_translator):
+        counter = itertools.count()
+        with mock.patch.object(uuid, "uuid4", lambda: f"id-{next(counter)}"):
+            outputs.append(fn(agent, events))
+    assert outputs[0] == outputs[1], "translators disagree"
+    return len(outputs[0])
+
+
+def bench(name, fn, agent, events, turns):
+    start = time.perf_counter()
+    for _ in range(turns):
+        fn(agent, events)
+    elapsed = time.perf_counter() - start
+    per_event = elapsed / (turns * len(events))
+    print(f"{name:>10}: {per_event * 1e9:8.1f} ns/event  {elapsed / turns * 1e6:8.1f} us/turn")
+    return per_event
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--deltas", type=int, default=300)
+    args = parser.parse_args()
+
+    agent, events = record_turn(args.deltas)
+    messages = check_equivalent(agent, events)
+    print(f"{len(events)} events, {messages} messages per turn")
+    legacy = bench("legacy", run_legacy, agent, events, args.turns)
+    table = bench("translator", run_translator, agent, events, args.turns)
+    print(f"speedup: {legacy / table:.1f}x")
@@ -0,0 +1,90 @@
+"""
+Micro-benchmark of the config lookups done during graph setup: the linear
+helpers in src.graph.helpers.access against WorkflowIndex, on a synthetic
+workflow (200 agents, 500 tools, 25 tools per agent by default).
+
+Each iteration does what get_agents/get_last_agent_name/run_turn do per
+request: one tool lookup per agent tool, the rag tool lookup, the last
+agent's config and state data, and one compiled-agent lookup per agent.
+
+Usage (from the rowboat_agents directory):
+    python -m tests.benchmark_workflow_index --agents 200 --tools 500
+"""
+import argparse
+import os
+import random
+import time
+from types import SimpleNamespace
+
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+from src.graph.helpers.access import (  # noqa: E402
+    WorkflowIndex,
+    get_agent_by_name,
+    get_agent_config_by_name,
+    get_agent_data_by_name,
+    get_tool_config_by_name,
+    get_tool_config_by_type,
+)
+
+
+def make_workflow(n_agents, n_tools, tools_per_agent):
+    rng = random.Random(0)
+    tool_configs = [{"name": f"tool_{i}", "type": "webhook", "description": "", "parameters": {}} for i in range(n_tools)]
+    tool_configs.append({"name": "getArticleInfo", "type": "rag"})
+    agent_configs = [
+        {"name": f"agent_{i}", "tools": [f"tool_{t}" for t in rng.sample(range(n_tools), tools_per_agent)]}
+        for i in range(n_agents)
+    ]
+    agent_data = [{"name": f"agent_{i}", "history": []} for i in range(n_agents)]
+    agents = [SimpleNamespace(name=ac["name"]) for ac in agent_configs]
+    return agent_configs, tool_configs, agent_data, agents
+
+
+def linear_setup(agent_configs, tool_configs, agent_data, agents):
+    for ac in agent_configs:
+        for tool_name in ac["tools"]:
+            get_tool_config_by_name(tool_configs, tool_name)
+    get_tool_config_by_type(tool_configs, "rag")
+    last = agent_configs[-1]["name"]
+    get_agent_config_by_name(last, agent_configs)
+    get_agent_data_by_name(last, agent_data)
+    for ac in agent_configs:
+        get_agent_by_name(ac["name"], agents)
+
+
+def indexed_setup(agent_configs, tool_configs, agent_data, agents):
+    index = WorkflowIndex(agent_configs, tool_configs, agent_data)
+    for ac in agent_configs:
+        for tool_name in ac["tools"]:
+            index.get_tool_config(tool_name)
+    index.get_tool_config_by_type("rag")
+    last = agent_configs[-1]["name"]
+    index.get_agent_config(last)
+    index.get_agent_data(last)
+    index.add_agents(agents)
+    for ac in agent_configs:
+        index.get_agent(ac["name"])
+
+
+def bench(name, fn, workflow, iterations):
+    start = time.perf_counter()
+    for _ in range(iterations):
+        fn(*workflow)
+    elapsed = (time.perf_counter() - start) / iterations
+    print(f"{name:>8}: {elapsed * 1000:8.3f} ms per request setup")
+    return elapsed
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--agents", type=int, default=200)
+    parser.add_argument("--tools", type=int, default=500)
+    parser.add_argument("--tools-per-agent", type=int, default=25)
+    parser.add_argument("--iterations", type=int, default=20)
+    args = parser.parse_args()
+
+    workflow = make_workflow(args.agents, args.tools, args.tools_per_agent)
+    linear = bench("linear", linear_setup, workflow, args.iterations)
+    indexed = bench("indexed", indexed_setup, workflow, args.iterations)
+    print(f"speedup: {linear / indexed:.1f}x")